@@ -1,24 +1,268 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
+import sqlite3
+import threading
+import time
 import sys
+import os
 sys.path.append('..')
 
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
 from inference.predict import AQIPredictor, HealthAlerts
+from inference.online_evaluator import OnlineEvaluator
 from data_fetch.data_manager import DataManager
-from config.config import CITIES
+from data_fetch.station_registry import get_registry
+from data_fetch.rollups import RollupManager, RESOLUTIONS, METRICS
+from preprocessing.feature_engineering import FeatureEngineering
+from backend.broadcaster import UpdateBroadcaster, LiveUpdatePublisher
+from backend.serialization import (
+    encode_payload, compress_body, resolve_format, UnsupportedFormatError,
+    NotAcceptableError
+)
+from config.config import (
+    CITIES, FORECAST_HOURS, STREAM_POLL_SECONDS, STREAM_HEARTBEAT_SECONDS,
+    STREAM_CLIENT_QUEUE_SIZE, HISTORY_MAX_POINTS, NEAREST_DEFAULT_K,
+    BEST_MODEL_REFRESH_SECONDS, LIVE_FEATURE_HISTORY_DAYS
+)
 
 app = Flask(__name__)
 CORS(app)
 
-try:
-    predictor = AQIPredictor()
-    data_manager = DataManager()
-except:
-    print("Warning: Could not load models. Run training first.")
+predictor = None
+data_manager = None
+rollups = None
+evaluator = None
+
+def load_services():
+    # Called at import so a preloading server loads models once in the master
+    # process and workers share the pages copy-on-write after fork
+    global predictor, data_manager, rollups, evaluator
+    try:
+        data_manager = DataManager()
+        rollups = RollupManager(data_manager.db_path)
+        rollups.ensure_tables()
+        evaluator = OnlineEvaluator(data_manager.db_path)
+    except Exception as e:
+        print(f"Warning: Could not initialise data manager: {e}")
+    try:
+        predictor = AQIPredictor()
+    except Exception as e:
+        print(f"Warning: Could not load models. Run training first. ({e})")
+
+load_services()
+
+def nan_to_none(values):
+    # Missing readings are serialized as null rather than 0 or NaN
+    return [None if value is None or value != value else float(value) for value in values]
+
+def build_current_payload(df, city):
+    city_data = df[df['city'] == city].tail(1)
+    if city_data.empty:
+        return None
+    
+    latest = city_data.iloc[0]
+    aqi, pm2_5, pm10 = nan_to_none([latest['aqi'], latest['pm2_5'], latest['pm10']])
+    
+    return {
+        "city": city,
+        "timestamp": str(latest['timestamp']),
+        "aqi": aqi,
+        "pollutants": {
+            "PM2.5": pm2_5,
+            "PM10": pm10,
+        },
+        "health_alert": HealthAlerts.get_health_message(np.nan if aqi is None else aqi)
+    }
+
+feature_engineering = FeatureEngineering()
+_live_features = {"key": None, "features": None, "timestamps": None, "lock": threading.Lock()}
+
+def latest_features():
+    # Rebuilt only when reconciliation has written new canonical rows
+    key = latest_reconciled_rowid()
+    with _live_features["lock"]:
+        if _live_features["features"] is None or _live_features["key"] != key:
+            features, timestamps = feature_engineering.load_latest_features(
+                data_manager.db_path, history_days=LIVE_FEATURE_HISTORY_DAYS)
+            _live_features.update(key=key, features=features, timestamps=timestamps)
+        return _live_features["features"], _live_features["timestamps"]
+
+def ensemble_forecast(cities, hours=FORECAST_HOURS):
+    features, timestamps = latest_features()
+    selected = [city for city in cities if city in features.index]
+    if not selected:
+        return {}, None
+    values, info = predictor.forecast(features.loc[selected], timestamps.loc[selected], hours)
+    return dict(zip(selected, values.tolist())), info
+
+def format_forecast(city, predicted, info, forecast_time):
+    levels = HealthAlerts.levels_for(predicted)
+    forecasts = [
+        {"hour": hour, "predicted_aqi": aqi, "health_alert": level}
+        for hour, aqi, level in zip(range(1, len(predicted) + 1), predicted, levels)
+    ]
+    
+    return {
+        "city": city,
+        "forecast_time": forecast_time,
+        "forecasts": forecasts,
+        "ensemble": info
+    }
+
+def build_forecast_payload(city, hours=FORECAST_HOURS):
+    if predictor is None:
+        # No trained models yet: keep the dashboard populated with a placeholder
+        predicted = np.maximum(0, 100 + np.random.normal(0, 5, size=hours)).tolist()
+        info = None
+    else:
+        values, info = ensemble_forecast([city], hours)
+        predicted = values.get(city, [])
+    return format_forecast(city, predicted, info, datetime.now().isoformat())
+
+def requested_hours():
+    # None when ?hours= is not a whole number of hours within the horizon
+    try:
+        hours = int(request.args.get('hours', FORECAST_HOURS))
+    except ValueError:
+        return None
+    return hours if 1 <= hours <= FORECAST_HOURS else None
+
+def requested_cities():
+    raw = request.args.get('cities')
+    if not raw:
+        return list(CITIES.keys()), []
+    cities = [c.strip() for c in raw.split(',') if c.strip()]
+    unknown = [c for c in cities if c not in CITIES]
+    return [c for c in cities if c in CITIES], unknown
+
+def bulk_response(payload, fmt):
+    body, mimetype = encode_payload(payload, fmt)
+    body, encoding = compress_body(body, request.headers.get('Accept-Encoding'))
+    
+    response = Response(body, status=200, mimetype=mimetype)
+    # The body depends on Accept (format) as well as Accept-Encoding
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def build_bulk_current(df, cities):
+    latest = df[df['city'].isin(cities)].sort_values('timestamp').groupby('city').tail(1)
+    aqi = latest['aqi'].astype(float).to_numpy()
+    
+    return {
+        "city": latest['city'].tolist(),
+        "timestamp": latest['timestamp'].astype(str).tolist(),
+        "aqi": nan_to_none(aqi),
+        "pm2_5": nan_to_none(latest['pm2_5'].astype(float)),
+        "pm10": nan_to_none(latest['pm10'].astype(float)),
+        "health_level": HealthAlerts.levels_for(aqi).tolist(),
+    }
+
+def build_bulk_forecast(cities, hours=FORECAST_HOURS):
+    if predictor is None:
+        predicted = np.maximum(0, 100 + np.random.normal(0, 5, size=(len(cities), hours)))
+        predicted, info = predicted.round(2).tolist(), None
+    else:
+        # One ensemble call per hour covers every requested city
+        values, info = ensemble_forecast(cities, hours)
+        predicted = [values.get(city, []) for city in cities]
+    
+    return {
+        "forecast_time": datetime.now().isoformat(),
+        "hours": list(range(1, hours + 1)),
+        "city": list(cities),
+        "predicted_aqi": predicted,
+        "ensemble": info,
+    }
+
+def parse_timestamp(value):
+    # Stored timestamps are naive local time; convert aware inputs to match
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def latest_station_readings(station_ids, days=1):
+    # Most recent non-null value of each metric per station; weather and
+    # pollution arrive as separate rows so the columns are resolved independently
+    since = (datetime.now() - timedelta(days=days)).isoformat()
+    placeholders = ",".join("?" for _ in station_ids)
+    conn = sqlite3.connect(data_manager.db_path)
+    try:
+        df = pd.read_sql_query(f"""
+            SELECT station_id, aqi, pm2_5, pm10 FROM aqi_data
+            WHERE station_id IN ({placeholders}) AND timestamp >= ?
+            ORDER BY timestamp
+        """, conn, params=(*station_ids, since))
+    finally:
+        conn.close()
+    return df.groupby('station_id').last()
+
+def latest_ingest_timestamp():
+    conn = sqlite3.connect(data_manager.db_path)
+    try:
+        return conn.execute("SELECT MAX(timestamp) FROM aqi_data").fetchone()[0]
+    finally:
+        conn.close()
+
+def latest_reconciled_rowid():
+    # Advances whenever reconciliation folds new raw rows into aqi_hourly,
+    # including rows that only revise an hour already present
+    conn = sqlite3.connect(data_manager.db_path)
+    try:
+        row = conn.execute(
+            "SELECT last_rowid FROM reconcile_state WHERE name = 'aqi_data'"
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+_best_model_refresh = {"at": 0.0, "lock": threading.Lock()}
+
+def refresh_best_model():
+    # Forecasts are logged and scored by the ingest cycle; each worker only
+    # re-reads the live metrics now and then to pick its serving model
+    if predictor is None:
+        return
+    with _best_model_refresh["lock"]:
+        if time.monotonic() - _best_model_refresh["at"] < BEST_MODEL_REFRESH_SECONDS:
+            return
+        _best_model_refresh["at"] = time.monotonic()
+    predictor.refresh_best_model(evaluator.summary()["models"])
+
+def live_update_key():
+    # Changes when an ingest cycle stores new readings or new forecasts
+    return latest_ingest_timestamp(), data_manager.latest_forecast_time()
+
+def build_live_updates():
+    # Runs in the gevent stream process, so it only reads what the ingest
+    # cycle stored: forecasts are computed there, never on the event loop
+    df = data_manager.get_training_data(days=1)
+    forecasts = data_manager.get_latest_forecasts()
+    
+    for city in CITIES:
+        current = build_current_payload(df, city)
+        if current is not None:
+            yield "current", city, current
+        if city in forecasts:
+            stored = forecasts[city]
+            yield "forecast", city, format_forecast(
+                city, stored["predicted"], stored["ensemble"], stored["forecast_time"])
+
+broadcaster = UpdateBroadcaster(max_queue_size=STREAM_CLIENT_QUEUE_SIZE)
+live_publisher = LiveUpdatePublisher(
+    broadcaster, live_update_key, build_live_updates,
+    poll_seconds=STREAM_POLL_SECONDS
+)
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -35,6 +279,43 @@ def get_cities():
         "count": len(CITIES)
     }), 200
 
+@app.route('/api/nearest', methods=['GET'])
+def get_nearest():
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return jsonify({"error": "lat/lon out of range"}), 400
+        
+        registry = get_registry()
+        if 'radius_km' in request.args:
+            neighbours = registry.within_radius(lat, lon, float(request.args['radius_km']))
+        else:
+            neighbours = registry.nearest(lat, lon, int(request.args.get('k', NEAREST_DEFAULT_K)))
+        
+        latest = latest_station_readings([station["id"] for station, _ in neighbours])
+        
+        interpolated = {}
+        for column in ['aqi', 'pm2_5', 'pm10']:
+            interpolated[column] = registry.interpolate(neighbours, latest[column].to_dict())
+        
+        aqi = interpolated['aqi']
+        return jsonify({
+            "lat": lat,
+            "lon": lon,
+            "stations": [
+                {**station, "distance_km": round(distance, 3)}
+                for station, distance in neighbours
+            ],
+            "interpolated": interpolated,
+            "health_alert": HealthAlerts.get_health_message(aqi) if aqi is not None else None
+        }), 200
+    
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon query parameters are required numbers"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/current/<city>', methods=['GET'])
 def get_current_data(city):
     try:
@@ -42,24 +323,12 @@ def get_current_data(city):
             return jsonify({"error": "City not found"}), 404
         
         df = data_manager.get_training_data(days=1)
-        city_data = df[df['city'] == city].tail(1)
+        payload = build_current_payload(df, city)
         
-        if city_data.empty:
+        if payload is None:
             return jsonify({"error": "No data available"}), 404
         
-        latest = city_data.iloc
-        health_info = HealthAlerts.get_health_message(latest['aqi'] or 0)
-        
-        return jsonify({
-            "city": city,
-            "timestamp": str(latest['timestamp']),
-            "aqi": float(latest['aqi'] or 0),
-            "pollutants": {
-                "PM2.5": float(latest['pm2_5'] or 0),
-                "PM10": float(latest['pm10'] or 0),
-            },
-            "health_alert": health_info
-        }), 200
+        return jsonify(payload), 200
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -70,32 +339,141 @@ def get_forecast(city):
         if city not in CITIES:
             return jsonify({"error": "City not found"}), 404
         
-        forecasts = []
-        for hour in range(1, 49):
-            predicted_aqi = 100 + (np.random.normal(0, 5))
-            predicted_aqi = max(0, predicted_aqi)
-            
-            health_info = HealthAlerts.get_health_message(predicted_aqi)
-            
-            forecasts.append({
-                "hour": hour,
-                "predicted_aqi": float(predicted_aqi),
-                "health_alert": health_info["level"],
-            })
+        hours = requested_hours()
+        if hours is None:
+            return jsonify({"error": f"hours must be between 1 and {FORECAST_HOURS}"}), 400
         
-        return jsonify({
-            "city": city,
-            "forecast_time": datetime.now().isoformat(),
-            "forecasts": forecasts
-        }), 200
+        refresh_best_model()
+        return jsonify(build_forecast_payload(city, hours)), 200
     
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/bulk/current', methods=['GET'])
+def get_bulk_current():
+    try:
+        cities, unknown = requested_cities()
+        if unknown:
+            return jsonify({"error": "City not found", "cities": unknown}), 404
+        
+        fmt = resolve_format(request.args.get('format'), request.headers.get('Accept'))
+        df = data_manager.get_training_data(days=1)
+        columns = build_bulk_current(df, cities)
+        
+        if fmt == 'json':
+            names = list(columns.keys())
+            rows = [dict(zip(names, values)) for values in zip(*columns.values())]
+            return bulk_response({"cities": rows, "count": len(rows)}, fmt)
+        
+        return bulk_response({"columns": list(columns.keys()), "data": columns}, fmt)
+    
+    except UnsupportedFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    except NotAcceptableError as e:
+        return jsonify({"error": str(e)}), 406
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/bulk/forecast', methods=['GET'])
+def get_bulk_forecast():
+    try:
+        cities, unknown = requested_cities()
+        if unknown:
+            return jsonify({"error": "City not found", "cities": unknown}), 404
+        
+        fmt = resolve_format(request.args.get('format'), request.headers.get('Accept'))
+        hours = requested_hours()
+        if hours is None:
+            return jsonify({"error": f"hours must be between 1 and {FORECAST_HOURS}"}), 400
+        
+        refresh_best_model()
+        forecast = build_bulk_forecast(cities, hours)
+        
+        if fmt == 'json':
+            rows = [
+                {"city": city, "predicted_aqi": values}
+                for city, values in zip(forecast["city"], forecast["predicted_aqi"])
+            ]
+            return bulk_response({
+                "forecast_time": forecast["forecast_time"],
+                "hours": forecast["hours"],
+                "forecasts": rows,
+                "ensemble": forecast["ensemble"]
+            }, fmt)
+        
+        return bulk_response(forecast, fmt)
+    
+    except UnsupportedFormatError as e:
+        return jsonify({"error": str(e)}), 400
+    except NotAcceptableError as e:
+        return jsonify({"error": str(e)}), 406
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/history/<city>', methods=['GET'])
+def get_history(city):
+    try:
+        if city not in CITIES:
+            return jsonify({"error": "City not found"}), 404
+        
+        end = parse_timestamp(request.args['end']) if 'end' in request.args else datetime.now()
+        start = (parse_timestamp(request.args['start']) if 'start' in request.args
+                 else end - timedelta(days=7))
+        if start > end:
+            return jsonify({"error": "start must be before end"}), 400
+        
+        resolution = request.args.get('resolution')
+        if resolution is not None and resolution not in RESOLUTIONS:
+            return jsonify({"error": f"resolution must be one of {list(RESOLUTIONS)}"}), 400
+        
+        metrics = request.args.get('metrics', 'aqi,pm2_5,pm10').split(',')
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            return jsonify({"error": f"Unknown metrics: {unknown}", "available": METRICS}), 400
+        
+        max_points = int(request.args.get('max_points', HISTORY_MAX_POINTS))
+        selected = RollupManager.select_resolution(start, end, resolution, max_points)
+        if selected is None:
+            return jsonify({"error": "No rollup retains data for the requested range"}), 404
+        
+        history = rollups.query(city, start, end, metrics, selected)
+        history.update({"city": city, "start": start.isoformat(), "end": end.isoformat()})
+        return jsonify(history), 200
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/stream', methods=['GET'])
+def stream_updates():
+    # Under gunicorn, streams live in the gevent process (serve.py --stream)
+    if not app.config.get("STREAM_ENABLED", True):
+        return jsonify({"error": "Live updates are served by the stream server"}), 503
+    
+    live_publisher.ensure_started()
+    subscription = broadcaster.subscribe()
+    
+    response = Response(
+        stream_with_context(broadcaster.stream(subscription, STREAM_HEARTBEAT_SECONDS)),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/model-performance', methods=['GET'])
 def get_model_performance():
     try:
-        perf = predictor.get_model_performance()
+        refresh_best_model()
+        if predictor is None:
+            return jsonify({"timestamp": datetime.now().isoformat(), "live": evaluator.summary()}), 200
+        
+        perf = predictor.get_model_performance(live=evaluator.summary(baseline=predictor.metrics))
         return jsonify(perf), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -105,17 +483,18 @@ def city_comparison():
     try:
         df = data_manager.get_training_data(days=1)
         latest = df.sort_values('timestamp').groupby('city').tail(1)
+        aqi = latest['aqi'].astype(float).to_numpy()
+        # Worst first; cities without an AQI sort last
+        order = np.argsort(-aqi, kind='stable')
         
-        comparison = []
-        for _, row in latest.iterrows():
-            health_info = HealthAlerts.get_health_message(row['aqi'] or 0)
-            comparison.append({
-                "city": row['city'],
-                "aqi": float(row['aqi'] or 0),
-                "health_level": health_info["level"],
-            })
-        
-        comparison.sort(key=lambda x: x['aqi'], reverse=True)
+        comparison = [
+            {"city": city, "aqi": value, "health_level": level}
+            for city, value, level in zip(
+                latest['city'].to_numpy()[order].tolist(),
+                nan_to_none(aqi[order]),
+                HealthAlerts.levels_for(aqi)[order]
+            )
+        ]
         
         return jsonify({"cities": comparison}), 200
     
@@ -123,7 +502,8 @@ def city_comparison():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    print("Starting AQI Prediction API Server...")
+    print("Starting AQI Prediction API Server (development)...")
+    print("For production use: python backend/serve.py")
     print("Running on http://0.0.0.0:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,118 @@
+import json
+import queue
+import threading
+from datetime import datetime
+
+
+class UpdateBroadcaster:
+    """Fan-out of server-sent events to every subscribed dashboard.
+
+    Each update is serialized to an SSE frame exactly once and the same
+    bytes are handed to all subscriber queues, so the cost of a publish
+    does not grow with the payload work per client.
+    """
+
+    def __init__(self, max_queue_size=32):
+        self.max_queue_size = max_queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._last_frames = {}
+
+    def subscribe(self):
+        with self._lock:
+            # Room for a full replay of the latest frame per key (one per
+            # city and event) plus the usual headroom for live updates
+            q = queue.Queue(maxsize=len(self._last_frames) + self.max_queue_size)
+            for frame in self._last_frames.values():
+                q.put_nowait(frame)
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    @staticmethod
+    def format_event(event, payload):
+        data = json.dumps(payload, separators=(',', ':'))
+        return f"event: {event}\ndata: {data}\n\n".encode('utf-8')
+
+    def publish(self, event, payload, key=None):
+        frame = self.format_event(event, payload)
+        with self._lock:
+            if key is not None:
+                self._last_frames[(event, key)] = frame
+            subscribers = list(self._subscribers)
+
+        for q in subscribers:
+            try:
+                q.put_nowait(frame)
+            except queue.Full:
+                # Slow client: drop its oldest frame rather than block the publisher
+                try:
+                    q.get_nowait()
+                    q.put_nowait(frame)
+                except (queue.Empty, queue.Full):
+                    pass
+        return len(subscribers)
+
+    def stream(self, q, heartbeat_seconds=15):
+        try:
+            while True:
+                try:
+                    yield q.get(timeout=heartbeat_seconds)
+                except queue.Empty:
+                    yield f": keep-alive {datetime.now().isoformat()}\n\n".encode('utf-8')
+        finally:
+            self.unsubscribe(q)
+
+
+class LiveUpdatePublisher:
+    """Background thread that publishes current readings and forecasts.
+
+    The database is checked once per poll interval regardless of how many
+    dashboards are connected; payloads are only rebuilt and pushed when the
+    latest stored timestamp moves, i.e. when an ingestion cycle completed.
+    """
+
+    def __init__(self, broadcaster, latest_timestamp_fn, build_updates_fn, poll_seconds=30):
+        self.broadcaster = broadcaster
+        self.latest_timestamp_fn = latest_timestamp_fn
+        self.build_updates_fn = build_updates_fn
+        self.poll_seconds = poll_seconds
+        self._last_seen = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # Started lazily so the thread lives in the process serving requests
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def poll_once(self):
+        latest = self.latest_timestamp_fn()
+        if latest is None or latest == self._last_seen:
+            return False
+        self._last_seen = latest
+        for event, key, payload in self.build_updates_fn():
+            self.broadcaster.publish(event, payload, key=key)
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"Live update error: {e}")
+            self._stop.wait(self.poll_seconds)
@@ -0,0 +1,120 @@
+"""Load-test harness for backend/serve.py.
+
+Starts the production server once per worker count, drives it with a fixed
+number of concurrent client threads for a fixed duration, and prints
+throughput and latency so scaling with worker count can be compared on the
+same CPU-only box.
+
+Usage: python backend/load_test.py --workers 1 2 4 --endpoint /api/forecast/Delhi
+"""
+import argparse
+import subprocess
+import sys
+import os
+import threading
+import time
+import urllib.request
+import urllib.error
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(base_url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=2) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.5)
+    return False
+
+
+def run_clients(url, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client():
+        local = []
+        failed = 0
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                local.append(time.perf_counter() - started)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), errors[0]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def benchmark(workers, threads, port, endpoint, concurrency, duration):
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(project_root, "backend", "serve.py"),
+         "--workers", str(workers), "--threads", str(threads),
+         "--bind", f"127.0.0.1:{port}", "--quiet"],
+        cwd=project_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_until_ready(base_url):
+            raise RuntimeError(f"Server with {workers} workers did not become ready")
+        # Warm up every worker before measuring
+        run_clients(base_url + endpoint, concurrency, 2)
+        latencies, errors = run_clients(base_url + endpoint, concurrency, duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure API throughput vs worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--endpoint", default="/api/forecast/Delhi")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args(argv)
+
+    print(f"{'workers':>8} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    baseline = None
+    for workers in args.workers:
+        result = benchmark(workers, args.threads, args.port, args.endpoint,
+                           args.concurrency, args.duration)
+        baseline = baseline or result["rps"]
+        print(f"{result['workers']:>8} {result['requests']:>9} {result['errors']:>7} "
+              f"{result['rps']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}"
+              f"   x{result['rps'] / baseline if baseline else 0:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import gzip
+import brotli
+import msgpack
+import orjson
+
+SUPPORTED_FORMATS = ("json", "columns", "msgpack")
+MIN_COMPRESS_BYTES = 1024
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised for a ``format`` query parameter the API does not offer."""
+
+
+class NotAcceptableError(ValueError):
+    """Raised when no offered format satisfies the Accept header."""
+
+
+def dumps_json(payload):
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=_json_default)
+
+
+def _json_default(value):
+    # numpy scalars and arrays expose tolist()/item() for plain Python types
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Media types offered for content negotiation, in order of preference on ties
+MEDIA_TYPES = (
+    ("application/json", "json"),
+    ("application/msgpack", "msgpack"),
+    ("application/x-msgpack", "msgpack"),
+)
+
+
+def parse_accept(header):
+    """Return (media range, q) pairs from an Accept header."""
+    ranges = []
+    for part in (header or "").split(','):
+        media, *params = [p.strip() for p in part.split(';')]
+        if not media:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media.lower(), quality))
+    return ranges
+
+
+def _quality(media_type, ranges):
+    # The most specific matching range decides: type/subtype > type/* > */*
+    kind = media_type.split('/')[0]
+    for candidate in (media_type, f"{kind}/*", "*/*"):
+        matches = [q for media, q in ranges if media == candidate]
+        if matches:
+            return max(matches)
+    return 0.0
+
+
+def resolve_format(requested, accept=None):
+    """Pick the response format from ?format= or, failing that, Accept.
+
+    An explicit but unknown ``format`` raises UnsupportedFormatError (400);
+    an Accept header matching none of the offered media types raises
+    NotAcceptableError (406). Accept q-values rank the offered types.
+    """
+    if requested is not None:
+        if requested not in SUPPORTED_FORMATS:
+            raise UnsupportedFormatError(
+                f"Unsupported format '{requested}'. Use one of {SUPPORTED_FORMATS}")
+        return requested
+
+    ranges = parse_accept(accept)
+    if not ranges:
+        return "json"
+    best_format, best_quality = None, 0.0
+    for media_type, fmt in MEDIA_TYPES:
+        quality = _quality(media_type, ranges)
+        if quality > best_quality:
+            best_format, best_quality = fmt, quality
+    if best_format is None:
+        raise NotAcceptableError("Acceptable types: application/json, application/msgpack")
+    return best_format
+
+
+def encode_payload(payload, fmt="json"):
+    """Serialize a payload and return (body, mimetype)."""
+    if fmt == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True, default=_json_default), "application/msgpack"
+    return dumps_json(payload), "application/json"
+
+
+def negotiate_encoding(accept_encoding):
+    accepted = set()
+    for part in (accept_encoding or "").split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        quality = params.strip().replace(' ', '')
+        if name and quality not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name)
+
+    if "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress_body(body, accept_encoding):
+    """Compress body according to Accept-Encoding; returns (body, encoding)."""
+    if len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding == "br":
+        return brotli.compress(body, quality=5), "br"
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
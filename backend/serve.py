@@ -0,0 +1,132 @@
+"""Production entry point: runs the Flask app under gunicorn.
+
+The API is pre-forked from a master that imports ``backend.app`` once
+(``preload_app``), so the scikit-learn/XGBoost models loaded by
+``load_services`` are shared copy-on-write instead of being loaded per
+worker. Each worker uses the ``gthread`` class, so blocking SQLite and model
+calls run on a per-request thread and a slow request does not hold up the
+others in that worker.
+
+TensorFlow is not fork-safe: importing it in the master starts threads and
+state that the forked workers inherit in a broken form. The LSTM is
+therefore never loaded pre-fork; each worker loads it in ``post_fork``.
+
+``/api/stream`` keeps a connection open per dashboard, which would pin one of
+the few gthread threads per client. Streams are served by a separate
+process (``--stream``) using gevent, where an idle connection costs a
+greenlet; the API process answers stream requests with 503. Model inference
+would block that event loop, so the stream process only publishes the
+forecasts each ingest cycle stores (``DataManager.store_latest_forecasts``).
+
+Usage: python backend/serve.py [--workers N] [--threads N] [--bind HOST:PORT]
+       python backend/serve.py --stream [--bind HOST:PORT]
+"""
+import argparse
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from gunicorn.app.base import BaseApplication
+
+from config.config import (
+    SERVER_BIND, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT,
+    SERVER_GRACEFUL_TIMEOUT, SERVER_KEEPALIVE, SERVER_PRELOAD,
+    STREAM_BIND, STREAM_WORKER_CONNECTIONS
+)
+
+
+class AQIServer(BaseApplication):
+    def __init__(self, options=None, stream=False):
+        self.options = options or {}
+        self.stream = stream
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        from backend import app as api
+        api.app.config["STREAM_ENABLED"] = self.stream
+        if not self.stream and api.predictor is not None and api.predictor.selector is not None:
+            # Follow --threads: the ensemble's load signal is per-worker concurrency
+            api.predictor.selector.load_threshold = self.cfg.threads
+        return api.app
+
+
+def load_lstm_post_fork(server, worker):
+    from backend import app as api
+    if api.predictor is not None:
+        try:
+            api.predictor.load_lstm()
+        except Exception as e:
+            print(f"Warning: Could not load LSTM in worker {worker.pid}: {e}")
+
+
+def build_options(workers=SERVER_WORKERS, threads=SERVER_THREADS, bind=SERVER_BIND,
+                  timeout=SERVER_TIMEOUT, preload=SERVER_PRELOAD):
+    return {
+        "bind": bind,
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "timeout": timeout,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "keepalive": SERVER_KEEPALIVE,
+        "preload_app": preload,
+        "post_fork": load_lstm_post_fork,
+        "accesslog": "-",
+    }
+
+
+def build_stream_options(bind=STREAM_BIND, connections=STREAM_WORKER_CONNECTIONS):
+    # One worker keeps a single publisher polling the database; the app is
+    # imported after gevent has patched the worker, so no preload
+    return {
+        "bind": bind,
+        "workers": 1,
+        "worker_class": "gevent",
+        "worker_connections": connections,
+        "timeout": SERVER_TIMEOUT,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "preload_app": False,
+        "accesslog": "-",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AQI API with gunicorn")
+    parser.add_argument("--stream", action="store_true",
+                        help="Serve only /api/stream on a gevent worker")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--threads", type=int, default=SERVER_THREADS)
+    parser.add_argument("--bind", default=None)
+    parser.add_argument("--timeout", type=int, default=SERVER_TIMEOUT)
+    parser.add_argument("--no-preload", action="store_true")
+    parser.add_argument("--quiet", action="store_true", help="Disable the access log")
+    args = parser.parse_args(argv)
+
+    if args.stream:
+        options = build_stream_options(bind=args.bind or STREAM_BIND)
+        description = f"{options['worker_connections']} gevent connections"
+    else:
+        options = build_options(
+            workers=args.workers, threads=args.threads, bind=args.bind or SERVER_BIND,
+            timeout=args.timeout, preload=SERVER_PRELOAD and not args.no_preload
+        )
+        description = f"{options['workers']} workers x {options['threads']} threads"
+    if args.quiet:
+        options["accesslog"] = None
+
+    role = "stream" if args.stream else "API"
+    print(f"Starting AQI Prediction {role} server on {options['bind']} ({description})")
+    AQIServer(options, stream=args.stream).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,49 @@ from .config import (
     IQAIR_API_KEY,
     CPCB_API_KEY,
     DATABASE_URL,
+    DB_PATH,
     CITIES,
+    STATIONS,
+    STATIONS_FILE,
+    NEAREST_DEFAULT_K,
+    IDW_POWER,
     FORECAST_HOURS,
     MODEL_PARAMS,
     POLLUTANTS,
     WEATHER_FEATURES,
     TARGET_R2,
     TARGET_RMSE,
-    TARGET_MAE
+    TARGET_MAE,
+    STREAM_POLL_SECONDS,
+    STREAM_HEARTBEAT_SECONDS,
+    STREAM_CLIENT_QUEUE_SIZE,
+    RAW_RETENTION_DAYS,
+    ROLLUP_RETENTION_DAYS,
+    HISTORY_MAX_POINTS,
+    RECONCILE_SOURCE_PRIORITY,
+    RECONCILE_FIELD_STRATEGY,
+    ONLINE_EVAL_DECAY,
+    DRIFT_RMSE_RATIO,
+    DRIFT_MIN_SAMPLES,
+    FORECAST_LOG_RETENTION_DAYS,
+    BEST_MODEL_REFRESH_SECONDS,
+    LIVE_FEATURE_HISTORY_DAYS,
+    ENSEMBLE_WEIGHTS_PATH,
+    ENSEMBLE_LATENCY_BUDGET_MS,
+    ENSEMBLE_ACCURACY_TARGET,
+    ENSEMBLE_MAX_WORKERS,
+    ENSEMBLE_LOAD_THRESHOLD,
+    ENSEMBLE_FALLBACK_TIMEOUT_MS,
+    ENSEMBLE_LATENCY_EWMA_ALPHA,
+    SERVER_BIND,
+    SERVER_WORKERS,
+    SERVER_THREADS,
+    SERVER_TIMEOUT,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_KEEPALIVE,
+    SERVER_PRELOAD,
+    STREAM_BIND,
+    STREAM_WORKER_CONNECTIONS
 )
 
 __all__ = [
@@ -19,12 +54,47 @@ __all__ = [
     'IQAIR_API_KEY',
     'CPCB_API_KEY',
     'DATABASE_URL',
+    'DB_PATH',
     'CITIES',
+    'STATIONS',
+    'STATIONS_FILE',
+    'NEAREST_DEFAULT_K',
+    'IDW_POWER',
     'FORECAST_HOURS',
     'MODEL_PARAMS',
     'POLLUTANTS',
     'WEATHER_FEATURES',
     'TARGET_R2',
     'TARGET_RMSE',
-    'TARGET_MAE'
+    'TARGET_MAE',
+    'STREAM_POLL_SECONDS',
+    'STREAM_HEARTBEAT_SECONDS',
+    'STREAM_CLIENT_QUEUE_SIZE',
+    'RAW_RETENTION_DAYS',
+    'ROLLUP_RETENTION_DAYS',
+    'HISTORY_MAX_POINTS',
+    'RECONCILE_SOURCE_PRIORITY',
+    'RECONCILE_FIELD_STRATEGY',
+    'ONLINE_EVAL_DECAY',
+    'DRIFT_RMSE_RATIO',
+    'DRIFT_MIN_SAMPLES',
+    'FORECAST_LOG_RETENTION_DAYS',
+    'BEST_MODEL_REFRESH_SECONDS',
+    'LIVE_FEATURE_HISTORY_DAYS',
+    'ENSEMBLE_WEIGHTS_PATH',
+    'ENSEMBLE_LATENCY_BUDGET_MS',
+    'ENSEMBLE_ACCURACY_TARGET',
+    'ENSEMBLE_MAX_WORKERS',
+    'ENSEMBLE_LOAD_THRESHOLD',
+    'ENSEMBLE_FALLBACK_TIMEOUT_MS',
+    'ENSEMBLE_LATENCY_EWMA_ALPHA',
+    'SERVER_BIND',
+    'SERVER_WORKERS',
+    'SERVER_THREADS',
+    'SERVER_TIMEOUT',
+    'SERVER_GRACEFUL_TIMEOUT',
+    'SERVER_KEEPALIVE',
+    'SERVER_PRELOAD',
+    'STREAM_BIND',
+    'STREAM_WORKER_CONNECTIONS'
 ]
\ No newline at end of file
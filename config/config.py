@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,18 +11,24 @@ CPCB_API_KEY = "579b464db66ec23bdd000001eed35a78497b4993484cd437724fd5dd"
 
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///aqi_data.db")
+DB_PATH = DATABASE_URL[len("sqlite:///"):] if DATABASE_URL.startswith("sqlite:///") else "aqi_data.db"
 
-# Cities to Monitor
-CITIES = {
-    "Delhi": {"lat": 28.7041, "lon": 77.1025},
-    "Mumbai": {"lat": 19.0760, "lon": 72.8777},
-    "Bangalore": {"lat": 12.9716, "lon": 77.5946},
-    "Kolkata": {"lat": 22.5726, "lon": 88.3639},
-    "Chennai": {"lat": 13.0827, "lon": 80.2707},
-    "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
-    "Pune": {"lat": 18.5204, "lon": 73.8567},
-    "Ahmedabad": {"lat": 23.0225, "lon": 72.5714},
-}
+# Monitoring Stations (loaded from data, see config/stations.json)
+STATIONS_FILE = os.getenv(
+    "STATIONS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stations.json")
+)
+
+with open(STATIONS_FILE, "r") as f:
+    STATIONS = json.load(f)["stations"]
+
+# Cities to Monitor, derived from the station registry (first station per city)
+CITIES = {}
+for _station in STATIONS:
+    CITIES.setdefault(_station["city"], {"lat": _station["lat"], "lon": _station["lon"]})
+
+# Nearest-station lookup and inverse-distance-weighted interpolation
+NEAREST_DEFAULT_K = 4
+IDW_POWER = 2
 
 # Forecast Horizon
 FORECAST_HOURS = 48
@@ -43,3 +50,55 @@ WEATHER_FEATURES = ["temperature", "humidity", "wind_speed", "pressure"]
 TARGET_R2 = 0.85
 TARGET_RMSE = 25
 TARGET_MAE = 15
+
+# Live Update Stream (Server-Sent Events)
+STREAM_POLL_SECONDS = 30
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_CLIENT_QUEUE_SIZE = 32
+
+# Historical Rollups and Retention (days; None keeps forever)
+RAW_RETENTION_DAYS = 90
+ROLLUP_RETENTION_DAYS = {"hourly": 365, "daily": None, "monthly": None}
+HISTORY_MAX_POINTS = 500
+
+# Multi-Source Reconciliation (one canonical row per city per hour)
+RECONCILE_SOURCE_PRIORITY = ["CPCB", "OpenWeather", "IQAir", "Generated"]
+RECONCILE_FIELD_STRATEGY = {
+    "default": "priority",
+    "temperature": "mean",
+    "humidity": "mean",
+    "pressure": "mean",
+    "wind_speed": "mean",
+}
+
+# Online Model Evaluation
+ONLINE_EVAL_DECAY = 0.995  # per-observation decay of rolling metrics (~140 obs half-life)
+DRIFT_RMSE_RATIO = 1.5
+DRIFT_MIN_SAMPLES = 50
+FORECAST_LOG_RETENTION_DAYS = 7
+BEST_MODEL_REFRESH_SECONDS = 300  # how often API workers re-read live metrics
+LIVE_FEATURE_HISTORY_DAYS = 2  # canonical history needed for lag/rolling features
+
+# Latency-Aware Ensemble (inference/model_selector.py)
+ENSEMBLE_WEIGHTS_PATH = "saved_models/ensemble_weights.json"
+ENSEMBLE_LATENCY_BUDGET_MS = 200
+ENSEMBLE_ACCURACY_TARGET = TARGET_R2
+ENSEMBLE_MAX_WORKERS = 16  # shared threads; members that do not fit run inline
+ENSEMBLE_FALLBACK_TIMEOUT_MS = 1000  # extra wait for a first member after the budget
+ENSEMBLE_LATENCY_EWMA_ALPHA = 0.2
+
+# Production Server (backend/serve.py)
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5000")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", 4))
+# A gthread worker runs at most SERVER_THREADS requests at once, so the
+# ensemble degrades once every thread is busy with one and new requests queue
+ENSEMBLE_LOAD_THRESHOLD = SERVER_THREADS
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", 60))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", 5))
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "1") == "1"
+# Server-Sent Events run in their own gevent process so open streams never
+# hold the API's request threads
+STREAM_BIND = os.getenv("STREAM_BIND", "0.0.0.0:5001")
+STREAM_WORKER_CONNECTIONS = int(os.getenv("STREAM_WORKER_CONNECTIONS", 1000))
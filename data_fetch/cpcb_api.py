@@ -9,7 +9,14 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from config.config import CPCB_API_KEY, CITIES
+from config.config import CPCB_API_KEY
+from data_fetch.station_registry import get_registry
+
+# CPCB pollutant ids -> record keys; concentrations are µg/m³ except CO (mg/m³)
+POLLUTANT_IDS = {
+    "PM2.5": "PM2.5", "PM10": "PM10", "NO2": "NO2",
+    "SO2": "SO2", "CO": "CO", "OZONE": "O3",
+}
 
 class CPCBAPI:
     def __init__(self):
@@ -25,27 +32,31 @@ class CPCBAPI:
                 data = response.json()
                 records = data.get("records", [])
                 
+                registry = get_registry()
                 city_data = {}
                 for record in records:
                     try:
                         city = record.get("City", "Unknown")
-                        if city in CITIES:
-                            if city not in city_data:
-                                city_data[city] = {
+                        if registry.has_city(city):
+                            station_id = registry.match_station(city, record.get("Station"))
+                            key = (city, station_id)
+                            if key not in city_data:
+                                city_data[key] = {
                                     "city": city,
+                                    "station_id": station_id,
                                     "timestamp": datetime.now().isoformat(),
                                     "source": "CPCB",
                                     "PM2.5": None, "PM10": None, "NO2": None,
                                     "SO2": None, "CO": None, "O3": None, "AQI": None,
                                 }
                             
-                            if record.get("Pollutant_ID") == "PM2.5":
-                                city_data[city]["PM2.5"] = float(record.get("Pollutant_Max", 0) or 0)
-                            elif record.get("Pollutant_ID") == "PM10":
-                                city_data[city]["PM10"] = float(record.get("Pollutant_Max", 0) or 0)
-                            # Add other pollutants similarly
+                            pollutant = POLLUTANT_IDS.get(record.get("Pollutant_ID"))
+                            value = record.get("Pollutant_Max")
+                            if pollutant and value not in (None, "", "NA"):
+                                city_data[key][pollutant] = float(value)
                             
-                            city_data[city]["AQI"] = float(record.get("AQI", 0) or 0)
+                            if record.get("AQI") not in (None, "", "NA"):
+                                city_data[key]["AQI"] = float(record["AQI"])
                     except:
                         continue
                 
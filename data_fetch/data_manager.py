@@ -1,92 +1,326 @@
-# Add this function to DataManager class in data_manager.py
+import sqlite3
+import json
+import random
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+import sys
+import os
 
-def generate_sample_data(self):
-    """Generate realistic sample data for training if APIs fail"""
-    import random
-    from datetime import datetime, timedelta
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import CITIES, DB_PATH, FORECAST_HOURS, LIVE_FEATURE_HISTORY_DAYS
+from data_fetch.openweather_api import OpenWeatherAPI
+from data_fetch.iqair_api import IQAirAPI
+from data_fetch.cpcb_api import CPCBAPI
+from data_fetch.rollups import RollupManager
+from data_fetch.reconciliation import SourceReconciler
+from data_fetch.station_registry import get_registry
+from inference.online_evaluator import OnlineEvaluator
+from preprocessing.aqi_calculator import NationalAQICalculator, COLUMN_MAP
+from preprocessing.feature_engineering import FeatureEngineering
+
+# Providers reporting CO in µg/m³; CPCB breakpoints are in mg/m³
+CO_SCALE_BY_SOURCE = {"OpenWeather": 0.001}
+
+aqi_calculator = NationalAQICalculator()
+
+def add_national_aqi(records, source):
+    """Overwrite provider AQI with the CPCB National AQI computed from pollutants"""
+    records = [r for r in records if r]
+    if not records:
+        return records
     
-    print("Generating sample data for training...")
-    conn = sqlite3.connect(self.db_path)
-    cursor = conn.cursor()
+    aqi = aqi_calculator.compute_records(records, CO_SCALE_BY_SOURCE.get(source, 1.0))
+    for record, value in zip(records, aqi):
+        if not np.isnan(value):
+            record["AQI"] = float(value)
+        elif source != "CPCB" or not record.get("AQI"):
+            # IQAir reports US EPA AQI; never store it on the Indian scale.
+            # A missing (or defaulted 0) provider AQI is unknown, not "clean air"
+            record["AQI"] = None
+    return records
+
+# Record key -> aqi_data column for everything the API clients return
+RECORD_COLUMNS = {
+    **COLUMN_MAP, "AQI": "aqi", "temperature": "temperature", "humidity": "humidity",
+    "pressure": "pressure", "wind_speed": "wind_speed",
+}
+
+
+class DataManager:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.openweather = OpenWeatherAPI()
+        self.iqair = IQAirAPI()
+        self.cpcb = CPCBAPI()
+        self.predictor = None
+        self.ensure_tables()
+        self.reconciler = SourceReconciler(db_path)
     
-    cities_list = list(CITIES.keys())
+    def ensure_tables(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS aqi_data (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                city TEXT NOT NULL,
+                station_id TEXT,
+                timestamp TEXT NOT NULL,
+                source TEXT NOT NULL,
+                pm2_5 REAL,
+                pm10 REAL,
+                no2 REAL,
+                so2 REAL,
+                co REAL,
+                o3 REAL,
+                aqi REAL,
+                temperature REAL,
+                humidity REAL,
+                pressure REAL,
+                wind_speed REAL,
+                UNIQUE (city, station_id, timestamp, source)
+            );
+            CREATE INDEX IF NOT EXISTS idx_aqi_data_city_time ON aqi_data (city, timestamp);
+            CREATE TABLE IF NOT EXISTS latest_forecasts (
+                city TEXT PRIMARY KEY,
+                issued_at TEXT NOT NULL,
+                forecast_time TEXT NOT NULL,
+                predicted TEXT NOT NULL,
+                ensemble TEXT
+            );
+        """)
+        conn.commit()
+        conn.close()
+        self.ensure_station_column()
     
-    # Generate 30 days of hourly data (720 records per city)
-    for city in cities_list:
-        for hour_offset in range(0, 720):
-            timestamp = (datetime.now() - timedelta(hours=hour_offset)).isoformat()
-            
-            # Realistic AQI values (higher in winter, morning rush hours)
-            base_aqi = random.randint(60, 180)
-            
-            cursor.execute("""
-                INSERT OR IGNORE INTO aqi_data 
-                (city, timestamp, source, pm2_5, pm10, no2, so2, co, o3, aqi, 
-                 temperature, humidity, pressure, wind_speed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                city,
-                timestamp,
-                "Generated",
-                round(random.uniform(15, 150), 2),  # PM2.5
-                round(random.uniform(30, 250), 2),  # PM10
-                round(random.uniform(10, 80), 2),   # NO2
-                round(random.uniform(5, 50), 2),    # SO2
-                round(random.uniform(0.5, 3), 2),   # CO
-                round(random.uniform(20, 100), 2),  # O3
-                base_aqi,                            # AQI
-                round(random.uniform(15, 35), 2),   # temperature
-                round(random.uniform(30, 90), 2),   # humidity
-                round(random.uniform(1010, 1020), 2), # pressure
-                round(random.uniform(0, 10), 2)     # wind_speed
-            ))
-        
-        print(f"Generated {hour_offset} records for {city}")
+    def ensure_station_column(self):
+        """Add aqi_data.station_id to databases created before it existed"""
+        conn = sqlite3.connect(self.db_path)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(aqi_data)")]
+        if "station_id" not in columns:
+            conn.execute("ALTER TABLE aqi_data ADD COLUMN station_id TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_aqi_data_station ON aqi_data (station_id, timestamp)")
+        conn.commit()
+        conn.close()
     
-    conn.commit()
-    conn.close()
-    print("Sample data generated successfully!")
-
-# In fetch_and_store_data() method, add this at the end:
-def fetch_and_store_data(self):
-    print(f"[{datetime.now()}] Starting data fetch...")
+    def insert_aqi_data(self, records, source):
+        """Store readings keyed by city and the station that measured them"""
+        columns = list(dict.fromkeys(RECORD_COLUMNS.values()))
+        rows = []
+        for record in records:
+            if not record:
+                continue
+            values = {column: None for column in columns}
+            for key, column in RECORD_COLUMNS.items():
+                if record.get(key) is not None:
+                    values[column] = record[key]
+            rows.append((record["city"], record.get("station_id"),
+                         record.get("timestamp", datetime.now().isoformat()),
+                         record.get("source", source), *values.values()))
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany(f"""
+            INSERT OR IGNORE INTO aqi_data
+            (city, station_id, timestamp, source, {', '.join(columns)})
+            VALUES ({', '.join('?' for _ in range(len(columns) + 4))})
+        """, rows)
+        conn.commit()
+        conn.close()
+        return len(rows)
+    
+    def get_training_data(self, days=30):
+        """Readings that carry an AQI value from the last `days` days, oldest first"""
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        conn = sqlite3.connect(self.db_path)
+        df = pd.read_sql_query(
+            "SELECT * FROM aqi_data WHERE timestamp >= ? AND aqi IS NOT NULL ORDER BY timestamp",
+            conn, params=(since,))
+        conn.close()
+        df['timestamp'] = pd.to_datetime(df['timestamp'].map(datetime.fromisoformat))
+        return df
     
-    try:
-        print("Fetching from OpenWeather...")
-        ow_data = self.openweather.fetch_all_cities()
-        if ow_data["pollution"]:
-            self.insert_aqi_data(ow_data["pollution"], "OpenWeather")
-        if ow_data["weather"]:
-            self.insert_aqi_data(ow_data["weather"], "OpenWeather")
-    except Exception as e:
-        print(f"OpenWeather error: {e}")
+    def get_predictor(self):
+        # Loaded once per ingest process, after the first successful training run
+        if self.predictor is None:
+            from inference.predict import AQIPredictor
+            self.predictor = AQIPredictor()
+        return self.predictor
     
-    try:
-        print("Fetching from IQAir...")
-        iqair_data = self.iqair.fetch_all_cities()
-        if iqair_data:
-            self.insert_aqi_data(iqair_data, "IQAir")
-    except Exception as e:
-        print(f"IQAir error: {e}")
+    def log_model_forecasts(self):
+        """Log every model's next-hour forecast per city so all models are scored live"""
+        features, issued_at = FeatureEngineering().load_latest_features(
+            self.db_path, history_days=LIVE_FEATURE_HISTORY_DAYS)
+        if features.empty:
+            return 0
+        
+        evaluator = OnlineEvaluator(self.db_path)
+        logged = 0
+        for model_name, predicted in self.get_predictor().predict_all(features).items():
+            for city, value, issued in zip(features.index, predicted, issued_at):
+                logged += evaluator.record_forecast(model_name, city, [value], issued.to_pydatetime())
+        return logged
+    
+    def store_latest_forecasts(self):
+        """Store each city's FORECAST_HOURS ensemble forecast for the stream server to publish"""
+        features, issued_at = FeatureEngineering().load_latest_features(
+            self.db_path, history_days=LIVE_FEATURE_HISTORY_DAYS)
+        if features.empty:
+            return 0
+        
+        values, info = self.get_predictor().forecast(features, issued_at, FORECAST_HOURS)
+        forecast_time = datetime.now().isoformat()
+        rows = [
+            (city, issued.isoformat(), forecast_time, json.dumps(predicted), json.dumps(info))
+            for city, issued, predicted in zip(features.index, issued_at, values.tolist())
+        ]
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("INSERT OR REPLACE INTO latest_forecasts VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+        return len(rows)
     
-    try:
-        print("Fetching from CPCB...")
-        cpcb_data = self.cpcb.fetch_station_data()
-        if cpcb_data:
-            self.insert_aqi_data(cpcb_data, "CPCB")
-    except Exception as e:
-        print(f"CPCB error: {e}")
+    def get_latest_forecasts(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            "SELECT city, forecast_time, predicted, ensemble FROM latest_forecasts").fetchall()
+        conn.close()
+        return {
+            city: {"forecast_time": forecast_time, "predicted": json.loads(predicted),
+                   "ensemble": json.loads(ensemble) if ensemble else None}
+            for city, forecast_time, predicted, ensemble in rows
+        }
     
-    # Check if we have enough data
-    conn = sqlite3.connect(self.db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM aqi_data WHERE source='OpenWeather'")
-    count = cursor.fetchone()[0]
-    conn.close()
+    def latest_forecast_time(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT MAX(forecast_time) FROM latest_forecasts").fetchone()[0]
+        finally:
+            conn.close()
     
-    # If not enough data, generate sample data
-    if count < 100:
-        print("Not enough real data fetched. Generating sample data...")
-        self.generate_sample_data()
+    def generate_sample_data(self):
+        """Generate realistic sample data for training if APIs fail"""
+        print("Generating sample data for training...")
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cities_list = list(CITIES.keys())
+        registry = get_registry()
+        
+        # Generate 30 days of hourly data (720 records per city)
+        for city in cities_list:
+            station_id = registry.stations_for_city(city)[0]["id"]
+            for hour_offset in range(0, 720):
+                timestamp = (datetime.now() - timedelta(hours=hour_offset)).isoformat()
+                
+                # Realistic AQI values (higher in winter, morning rush hours)
+                base_aqi = random.randint(60, 180)
+                
+                cursor.execute("""
+                    INSERT OR IGNORE INTO aqi_data 
+                    (city, station_id, timestamp, source, pm2_5, pm10, no2, so2, co, o3, aqi, 
+                     temperature, humidity, pressure, wind_speed)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    city,
+                    station_id,
+                    timestamp,
+                    "Generated",
+                    round(random.uniform(15, 150), 2),  # PM2.5
+                    round(random.uniform(30, 250), 2),  # PM10
+                    round(random.uniform(10, 80), 2),   # NO2
+                    round(random.uniform(5, 50), 2),    # SO2
+                    round(random.uniform(0.5, 3), 2),   # CO
+                    round(random.uniform(20, 100), 2),  # O3
+                    base_aqi,                            # AQI
+                    round(random.uniform(15, 35), 2),   # temperature
+                    round(random.uniform(30, 90), 2),   # humidity
+                    round(random.uniform(1010, 1020), 2), # pressure
+                    round(random.uniform(0, 10), 2)     # wind_speed
+                ))
+            
+            print(f"Generated {hour_offset} records for {city}")
+        
+        conn.commit()
+        conn.close()
+        print("Sample data generated successfully!")
     
-    print(f"[{datetime.now()}] Data fetch completed!")
+    def fetch_and_store_data(self):
+        print(f"[{datetime.now()}] Starting data fetch...")
+        
+        try:
+            print("Fetching from OpenWeather...")
+            ow_data = self.openweather.fetch_all_cities()
+            if ow_data["pollution"]:
+                self.insert_aqi_data(add_national_aqi(ow_data["pollution"], "OpenWeather"), "OpenWeather")
+            if ow_data["weather"]:
+                self.insert_aqi_data(ow_data["weather"], "OpenWeather")
+        except Exception as e:
+            print(f"OpenWeather error: {e}")
+        
+        try:
+            print("Fetching from IQAir...")
+            iqair_data = self.iqair.fetch_all_cities()
+            if iqair_data:
+                self.insert_aqi_data(add_national_aqi(iqair_data, "IQAir"), "IQAir")
+        except Exception as e:
+            print(f"IQAir error: {e}")
+        
+        try:
+            print("Fetching from CPCB...")
+            cpcb_data = self.cpcb.fetch_station_data()
+            if cpcb_data:
+                self.insert_aqi_data(add_national_aqi(cpcb_data, "CPCB"), "CPCB")
+        except Exception as e:
+            print(f"CPCB error: {e}")
+        
+        # Check if we have enough data
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM aqi_data WHERE source='OpenWeather'")
+        count = cursor.fetchone()[0]
+        conn.close()
+        
+        # If not enough data, generate sample data
+        if count < 100:
+            print("Not enough real data fetched. Generating sample data...")
+            self.generate_sample_data()
+        
+        # Reconcile before retention so no unprocessed raw rows are purged
+        try:
+            reconciled = self.reconciler.reconcile()
+            print(f"Reconciled {reconciled} canonical hourly rows")
+        except Exception as e:
+            print(f"Reconciliation error: {e}")
+        
+        try:
+            print(f"Logged {self.log_model_forecasts()} model forecasts")
+        except Exception as e:
+            print(f"Forecast logging error: {e}")
+        
+        try:
+            print(f"Stored {FORECAST_HOURS}-hour forecasts for {self.store_latest_forecasts()} cities")
+        except Exception as e:
+            print(f"Forecast storage error: {e}")
+        
+        try:
+            scored = OnlineEvaluator(self.db_path).evaluate()
+            print(f"Scored {scored} stored forecasts against actuals")
+        except Exception as e:
+            print(f"Online evaluation error: {e}")
+        
+        try:
+            rollups = RollupManager(self.db_path)
+            rollups.ensure_tables()
+            print(f"Rolled up {rollups.update()} new rows")
+            rollups.apply_retention()
+        except Exception as e:
+            print(f"Rollup error: {e}")
+        
+        print(f"[{datetime.now()}] Data fetch completed!")
+
+
+if __name__ == "__main__":
+    DataManager().fetch_and_store_data()
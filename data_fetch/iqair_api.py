@@ -9,22 +9,17 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from config.config import IQAIR_API_KEY, CITIES
+from config.config import IQAIR_API_KEY
+from data_fetch.station_registry import get_registry
 
 class IQAirAPI:
     def __init__(self):
         self.api_key = IQAIR_API_KEY
         self.base_url = "http://api.waqi.info"
         
-    def fetch_city_data(self, city):
+    def fetch_city_data(self, city, city_code=None, station_id=None):
         try:
-            city_map = {
-                "Delhi": "delhi", "Mumbai": "mumbai", "Bangalore": "bangalore",
-                "Kolkata": "kolkata", "Chennai": "chennai", "Hyderabad": "hyderabad",
-                "Pune": "pune", "Ahmedabad": "ahmedabad",
-            }
-            
-            city_code = city_map.get(city, city.lower())
+            city_code = city_code or city.lower()
             params = {"token": self.api_key}
             url = f"{self.base_url}/feed/{city_code}/index.json"
             
@@ -36,6 +31,7 @@ class IQAirAPI:
                     current_data = data["data"]["current"]["pollution"]
                     return {
                         "city": city,
+                        "station_id": station_id,
                         "timestamp": datetime.now().isoformat(),
                         "source": "IQAir",
                         "PM2.5": current_data.get("pm25"),
@@ -53,8 +49,14 @@ class IQAirAPI:
     
     def fetch_all_cities(self):
         results = []
-        for city in CITIES.keys():
-            data = self.fetch_city_data(city)
+        seen = set()
+        for station in get_registry():
+            city_code = station.get("iqair_code") or station["city"].lower()
+            if city_code in seen:
+                continue
+            seen.add(city_code)
+            # Feeds shared by several stations are tagged with the first of them
+            data = self.fetch_city_data(station["city"], city_code, station["id"])
             if data:
                 results.append(data)
         return results
@@ -9,7 +9,8 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from config.config import OPENWEATHER_API_KEY, CITIES
+from config.config import OPENWEATHER_API_KEY
+from data_fetch.station_registry import get_registry
 
 class OpenWeatherAPI:
     def __init__(self):
@@ -17,7 +18,7 @@ class OpenWeatherAPI:
         self.pollution_url = "http://api.openweathermap.org/data/2.5/air_pollution"
         self.weather_url = "http://api.openweathermap.org/data/2.5/weather"
         
-    def fetch_pollution_data(self, city, lat, lon):
+    def fetch_pollution_data(self, city, lat, lon, station_id=None):
         try:
             params = {"lat": lat, "lon": lon, "appid": self.api_key}
             response = requests.get(self.pollution_url, params=params, timeout=10)
@@ -33,6 +34,7 @@ class OpenWeatherAPI:
                 
                 return {
                     "city": city,
+                    "station_id": station_id,
                     "timestamp": datetime.now().isoformat(),
                     "source": "OpenWeather",
                     "PM2.5": pollution.get("pm2_5"),
@@ -47,7 +49,7 @@ class OpenWeatherAPI:
             print(f"Error: {e}")
             return None
     
-    def fetch_weather_data(self, city, lat, lon):
+    def fetch_weather_data(self, city, lat, lon, station_id=None):
         try:
             params = {"lat": lat, "lon": lon, "appid": self.api_key, "units": "metric"}
             response = requests.get(self.weather_url, params=params, timeout=10)
@@ -56,6 +58,7 @@ class OpenWeatherAPI:
                 data = response.json()
                 return {
                     "city": city,
+                    "station_id": station_id,
                     "temperature": data["main"]["temp"],
                     "humidity": data["main"]["humidity"],
                     "pressure": data["main"]["pressure"],
@@ -70,9 +73,10 @@ class OpenWeatherAPI:
     
     def fetch_all_cities(self):
         results = {"pollution": [], "weather": []}
-        for city, coords in CITIES.items():
-            pollution_data = self.fetch_pollution_data(city, coords["lat"], coords["lon"])
-            weather_data = self.fetch_weather_data(city, coords["lat"], coords["lon"])
+        for station in get_registry():
+            city = station["city"]
+            pollution_data = self.fetch_pollution_data(city, station["lat"], station["lon"], station["id"])
+            weather_data = self.fetch_weather_data(city, station["lat"], station["lon"], station["id"])
             if pollution_data:
                 results["pollution"].append(pollution_data)
             if weather_data:
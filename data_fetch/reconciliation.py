@@ -0,0 +1,127 @@
+import sqlite3
+import pandas as pd
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import RECONCILE_SOURCE_PRIORITY, RECONCILE_FIELD_STRATEGY
+from data_fetch.rollups import METRICS as FIELDS
+
+HOUR_FORMAT = "%Y-%m-%dT%H:00:00"
+
+
+class SourceReconciler:
+    """Fuses per-source raw readings into one canonical row per city and hour.
+
+    Only hours touched by rows ingested since the last run (tracked by a
+    rowid watermark) are recomputed. Each field is either taken from the
+    highest-priority source that reported it in that hour ("priority") or
+    averaged across sources ("mean"), per RECONCILE_FIELD_STRATEGY.
+    """
+
+    def __init__(self, db_path, source_priority=None, field_strategy=None):
+        self.db_path = db_path
+        self.source_priority = source_priority or RECONCILE_SOURCE_PRIORITY
+        self.field_strategy = field_strategy or RECONCILE_FIELD_STRATEGY
+        self.ensure_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def ensure_tables(self):
+        columns = ",\n".join(f"                {field} REAL" for field in FIELDS)
+        conn = self._connect()
+        conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS aqi_hourly (
+                city TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+{columns},
+                sources TEXT,
+                n_readings INTEGER,
+                PRIMARY KEY (city, timestamp)
+            );
+            CREATE TABLE IF NOT EXISTS reconcile_state (
+                name TEXT PRIMARY KEY,
+                last_rowid INTEGER NOT NULL
+            );
+        """)
+        conn.commit()
+        conn.close()
+
+    def _strategy(self, field):
+        return self.field_strategy.get(field, self.field_strategy.get("default", "priority"))
+
+    def fuse(self, raw):
+        """Reduce raw rows (with an 'hour' column) to one row per city/hour."""
+        rank = {source: i for i, source in enumerate(self.source_priority)}
+        raw = raw.assign(
+            _rank=raw['source'].map(rank).fillna(len(rank)),
+        ).sort_values(['_rank', 'timestamp'], ascending=[True, False])
+
+        grouped = raw.groupby(['city', 'hour'], sort=False)
+        priority_fields = [f for f in FIELDS if self._strategy(f) == "priority"]
+        mean_fields = [f for f in FIELDS if self._strategy(f) == "mean"]
+
+        # groupby.first() skips NaN, so each field falls through to the next
+        # source in priority order when the preferred one did not report it
+        parts = []
+        if priority_fields:
+            parts.append(grouped[priority_fields].first())
+        if mean_fields:
+            parts.append(grouped[mean_fields].mean())
+        parts.append(grouped['source'].agg(lambda s: ",".join(sorted(set(s.dropna())))).rename('sources'))
+        parts.append(grouped.size().rename('n_readings'))
+
+        fused = pd.concat(parts, axis=1).reset_index().rename(columns={'hour': 'timestamp'})
+        return fused[['city', 'timestamp'] + FIELDS + ['sources', 'n_readings']]
+
+    def reconcile(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        row = cursor.execute(
+            "SELECT last_rowid FROM reconcile_state WHERE name = 'aqi_data'"
+        ).fetchone()
+        last_rowid = row[0] if row else 0
+        max_rowid = cursor.execute("SELECT MAX(rowid) FROM aqi_data").fetchone()[0]
+
+        if max_rowid is None or max_rowid <= last_rowid:
+            conn.close()
+            return 0
+
+        affected = pd.read_sql_query(
+            "SELECT DISTINCT city, strftime(?, timestamp) AS hour FROM aqi_data "
+            "WHERE rowid > ? AND rowid <= ? AND strftime(?, timestamp) IS NOT NULL",
+            conn, params=(HOUR_FORMAT, last_rowid, max_rowid, HOUR_FORMAT)
+        )
+
+        fused_rows = 0
+        if not affected.empty:
+            # Whole hours are re-fused so late or extra sources are merged in
+            raw = pd.read_sql_query(
+                f"SELECT city, timestamp, source, {', '.join(FIELDS)}, "
+                f"strftime(?, timestamp) AS hour FROM aqi_data "
+                f"WHERE timestamp >= ? AND rowid <= ?",
+                conn, params=(HOUR_FORMAT, affected['hour'].min(), max_rowid)
+            )
+            raw = raw.merge(affected, on=['city', 'hour'], how='inner')
+            fused = self.fuse(raw)
+
+            placeholders = ", ".join("?" for _ in fused.columns)
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO aqi_hourly ({', '.join(fused.columns)}) "
+                f"VALUES ({placeholders})",
+                fused.astype(object).where(fused.notna(), None).itertuples(index=False, name=None)
+            )
+            fused_rows = len(fused)
+
+        cursor.execute("""
+            INSERT INTO reconcile_state (name, last_rowid) VALUES ('aqi_data', ?)
+            ON CONFLICT (name) DO UPDATE SET last_rowid = excluded.last_rowid
+        """, (max_rowid,))
+        conn.commit()
+        conn.close()
+        return fused_rows
@@ -0,0 +1,207 @@
+import sqlite3
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import RAW_RETENTION_DAYS, ROLLUP_RETENTION_DAYS, HISTORY_MAX_POINTS
+
+# Resolution name -> (bucket format applied to ISO timestamps, nominal bucket seconds)
+RESOLUTIONS = {
+    "hourly": ("%Y-%m-%dT%H:00:00", 3600),
+    "daily": ("%Y-%m-%dT00:00:00", 86400),
+    "monthly": ("%Y-%m-01T00:00:00", 30 * 86400),
+}
+
+METRICS = ["pm2_5", "pm10", "no2", "so2", "co", "o3", "aqi",
+           "temperature", "humidity", "pressure", "wind_speed"]
+
+
+class RollupManager:
+    """Incrementally maintained min/mean/max rollups of aqi_data.
+
+    Raw rows are folded into every resolution exactly once: the rowid of the
+    last processed row is stored as a watermark, and each update only scans
+    rows above it, merging into existing buckets with an upsert.
+
+    Construction is cheap and runs no DDL; call ``ensure_tables`` once when
+    the process starts.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def ensure_tables(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS aqi_rollups (
+                resolution TEXT NOT NULL,
+                city TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                min_value REAL,
+                max_value REAL,
+                PRIMARY KEY (resolution, city, metric, bucket)
+            );
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                name TEXT PRIMARY KEY,
+                last_rowid INTEGER NOT NULL
+            );
+        """)
+        conn.commit()
+        conn.close()
+
+    def _watermark(self, cursor):
+        row = cursor.execute(
+            "SELECT last_rowid FROM rollup_state WHERE name = 'aqi_data'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _purge_watermark(self, cursor):
+        # Raw rows may only go once both the rollups and the reconciler
+        # (aqi_hourly, which training and online evaluation read) have them
+        try:
+            row = cursor.execute(
+                "SELECT last_rowid FROM reconcile_state WHERE name = 'aqi_data'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        return min(self._watermark(cursor), row[0] if row else 0)
+
+    def update(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        last_rowid = self._watermark(cursor)
+        max_rowid = cursor.execute("SELECT MAX(rowid) FROM aqi_data").fetchone()[0]
+
+        if max_rowid is None or max_rowid <= last_rowid:
+            conn.close()
+            return 0
+
+        for resolution, (bucket_format, _) in RESOLUTIONS.items():
+            for metric in METRICS:
+                cursor.execute(f"""
+                    INSERT INTO aqi_rollups
+                    (resolution, city, metric, bucket, count, total, min_value, max_value)
+                    SELECT ?, city, ?, strftime(?, timestamp),
+                           COUNT({metric}), SUM({metric}), MIN({metric}), MAX({metric})
+                    FROM aqi_data
+                    WHERE rowid > ? AND rowid <= ? AND {metric} IS NOT NULL
+                      AND strftime(?, timestamp) IS NOT NULL
+                    GROUP BY city, strftime(?, timestamp)
+                    ON CONFLICT (resolution, city, metric, bucket) DO UPDATE SET
+                        count = count + excluded.count,
+                        total = total + excluded.total,
+                        min_value = MIN(min_value, excluded.min_value),
+                        max_value = MAX(max_value, excluded.max_value)
+                """, (resolution, metric, bucket_format, last_rowid, max_rowid,
+                      bucket_format, bucket_format))
+
+        cursor.execute("""
+            INSERT INTO rollup_state (name, last_rowid) VALUES ('aqi_data', ?)
+            ON CONFLICT (name) DO UPDATE SET last_rowid = excluded.last_rowid
+        """, (max_rowid,))
+        conn.commit()
+        conn.close()
+        return max_rowid - last_rowid
+
+    def apply_retention(self, now=None):
+        """Drop raw rows and fine-grained buckets older than their retention."""
+        now = now or datetime.now()
+        conn = self._connect()
+        cursor = conn.cursor()
+        deleted = 0
+
+        if RAW_RETENTION_DAYS is not None:
+            cutoff = (now - timedelta(days=RAW_RETENTION_DAYS)).isoformat()
+            # Never drop rows that have not been folded into the rollups and
+            # aqi_hourly yet, nor the highest rowid: without AUTOINCREMENT SQLite would hand
+            # it out again and new rows would hide below the watermark
+            cursor.execute("""
+                DELETE FROM aqi_data
+                WHERE timestamp < ? AND rowid <= ?
+                  AND rowid < (SELECT MAX(rowid) FROM aqi_data)
+            """, (cutoff, self._purge_watermark(cursor)))
+            deleted += cursor.rowcount
+
+        for resolution, days in ROLLUP_RETENTION_DAYS.items():
+            if days is None:
+                continue
+            cutoff = (now - timedelta(days=days)).isoformat()
+            cursor.execute(
+                "DELETE FROM aqi_rollups WHERE resolution = ? AND bucket < ?",
+                (resolution, cutoff)
+            )
+
+        conn.commit()
+        conn.close()
+        return deleted
+
+    @staticmethod
+    def select_resolution(start, end, resolution=None, max_points=HISTORY_MAX_POINTS, now=None):
+        """Pick the rollup to serve a range query from.
+
+        Only rollups whose retention still covers ``start`` qualify. With an
+        explicit resolution, the coarsest qualifying rollup no coarser than
+        it is used; otherwise the finest one returning at most
+        ``max_points`` buckets, falling back to the coarsest available.
+        """
+        now = now or datetime.now()
+        span = max((end - start).total_seconds(), 0)
+        ordered = sorted(RESOLUTIONS, key=lambda r: RESOLUTIONS[r][1])
+
+        def covers(name):
+            days = ROLLUP_RETENTION_DAYS.get(name)
+            return days is None or start >= now - timedelta(days=days)
+
+        candidates = [r for r in ordered if covers(r)]
+        if resolution is not None:
+            limit = RESOLUTIONS[resolution][1]
+            within = [r for r in candidates if RESOLUTIONS[r][1] <= limit]
+            return within[-1] if within else None
+
+        for name in candidates:
+            if span / RESOLUTIONS[name][1] <= max_points:
+                return name
+        return candidates[-1] if candidates else None
+
+    def query(self, city, start, end, metrics, resolution):
+        bucket_format = RESOLUTIONS[resolution][0]
+        placeholders = ",".join("?" for _ in metrics)
+
+        conn = self._connect()
+        rows = conn.execute(f"""
+            SELECT bucket, metric, count, total, min_value, max_value
+            FROM aqi_rollups
+            WHERE resolution = ? AND city = ? AND metric IN ({placeholders})
+              AND bucket >= ? AND bucket <= ?
+            ORDER BY bucket
+        """, (resolution, city, *metrics, start.strftime(bucket_format), end.isoformat())).fetchall()
+        conn.close()
+
+        buckets = []
+        index = {}
+        series = {m: {"min": [], "mean": [], "max": [], "count": []} for m in metrics}
+        for bucket, metric, count, total, min_value, max_value in rows:
+            if bucket not in index:
+                index[bucket] = len(buckets)
+                buckets.append(bucket)
+                for values in series.values():
+                    for column in values.values():
+                        column.append(None)
+            i = index[bucket]
+            series[metric]["min"][i] = min_value
+            series[metric]["mean"][i] = total / count if count else None
+            series[metric]["max"][i] = max_value
+            series[metric]["count"][i] = count
+
+        return {"resolution": resolution, "buckets": buckets, "series": series}
@@ -0,0 +1,118 @@
+import numpy as np
+from sklearn.neighbors import BallTree
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import STATIONS, NEAREST_DEFAULT_K, IDW_POWER
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class StationRegistry:
+    """Monitoring stations with a haversine ball-tree for spatial lookups."""
+
+    def __init__(self, stations=None):
+        self.stations = list(STATIONS if stations is None else stations)
+        self._by_id = {s["id"]: s for s in self.stations}
+        self._cities = {}
+        for station in self.stations:
+            self._cities.setdefault(station["city"], []).append(station)
+
+        coords = np.radians([[s["lat"], s["lon"]] for s in self.stations])
+        self._tree = BallTree(coords, metric='haversine') if len(self.stations) else None
+
+    def __iter__(self):
+        return iter(self.stations)
+
+    def __len__(self):
+        return len(self.stations)
+
+    def get(self, station_id):
+        return self._by_id.get(station_id)
+
+    def has_city(self, city):
+        return city in self._cities
+
+    def cities(self):
+        return list(self._cities.keys())
+
+    def stations_for_city(self, city):
+        return self._cities.get(city, [])
+
+    def match_station(self, city, name=None):
+        """Station id for a city-level reading, or None if it is ambiguous."""
+        stations = self.stations_for_city(city)
+        for station in stations:
+            if name and station["name"].lower() == name.lower():
+                return station["id"]
+        return stations[0]["id"] if len(stations) == 1 else None
+
+    @staticmethod
+    def _query_point(lat, lon):
+        return np.radians([[float(lat), float(lon)]])
+
+    def nearest(self, lat, lon, k=NEAREST_DEFAULT_K):
+        if self._tree is None:
+            return []
+        k = max(1, min(int(k), len(self.stations)))
+        distances, indices = self._tree.query(self._query_point(lat, lon), k=k)
+        return [
+            (self.stations[i], float(d * EARTH_RADIUS_KM))
+            for d, i in zip(distances[0], indices[0])
+        ]
+
+    def within_radius(self, lat, lon, radius_km):
+        if self._tree is None:
+            return []
+        indices, distances = self._tree.query_radius(
+            self._query_point(lat, lon), r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True, sort_results=True
+        )
+        return [
+            (self.stations[i], float(d * EARTH_RADIUS_KM))
+            for d, i in zip(distances[0], indices[0])
+        ]
+
+    @staticmethod
+    def interpolate(neighbours, readings, power=IDW_POWER):
+        """Inverse-distance-weighted value at a point.
+
+        ``neighbours`` is the output of ``nearest``/``within_radius`` and
+        ``readings`` maps station id to a value; stations without a reading
+        are skipped. A station at (effectively) zero distance wins outright.
+        """
+        values = []
+        distances = []
+        for station, distance in neighbours:
+            value = readings.get(station["id"])
+            if value is None or value != value:
+                continue
+            values.append(float(value))
+            distances.append(distance)
+
+        if not values:
+            return None
+
+        values = np.array(values)
+        distances = np.array(distances)
+        exact = distances < 1e-6
+        if exact.any():
+            return float(values[exact].mean())
+
+        weights = 1.0 / distances ** power
+        return float(np.dot(weights, values) / weights.sum())
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = StationRegistry()
+    return _registry
@@ -1,10 +1,42 @@
 const API_BASE = 'http://localhost:5000/api';
+// Live updates come from the stream server (backend/serve.py --stream)
+const STREAM_BASE = 'http://localhost:5001/api';
 let forecastChart = null;
+let liveStream = null;
+const liveCache = { current: {}, forecast: {} };
 
 document.addEventListener('DOMContentLoaded', () => {
     loadCities();
+    connectLiveStream();
 });
 
+function connectLiveStream() {
+    if (!window.EventSource) return;
+    
+    liveStream = new EventSource(`${STREAM_BASE}/stream`);
+    
+    liveStream.addEventListener('current', (event) => {
+        const data = JSON.parse(event.data);
+        liveCache.current[data.city] = data;
+        if (data.city === selectedCity()) displayCurrentData(data);
+    });
+    
+    liveStream.addEventListener('forecast', (event) => {
+        const data = JSON.parse(event.data);
+        liveCache.forecast[data.city] = data;
+        if (data.city === selectedCity()) displayForecast(data);
+    });
+    
+    liveStream.onerror = (error) => {
+        // EventSource reconnects on its own; nothing to poll in the meantime
+        console.error('Live stream error:', error);
+    };
+}
+
+function selectedCity() {
+    return document.getElementById('citySelect').value;
+}
+
 async function loadCities() {
     try {
         const response = await fetch(`${API_BASE}/cities`);
@@ -28,10 +60,19 @@ async function loadCities() {
 }
 
 async function updateCity() {
-    const city = document.getElementById('citySelect').value;
+    const city = selectedCity();
     if (city) {
-        await loadCurrentData(city);
-        await loadForecast(city);
+        // Pushed updates already cover this city; only fetch what is missing
+        if (liveCache.current[city]) {
+            displayCurrentData(liveCache.current[city]);
+        } else {
+            await loadCurrentData(city);
+        }
+        if (liveCache.forecast[city]) {
+            displayForecast(liveCache.forecast[city]);
+        } else {
+            await loadForecast(city);
+        }
     }
 }
 
@@ -49,12 +90,12 @@ async function loadCurrentData(city) {
 }
 
 function displayCurrentData(data) {
-    const aqi = data.aqi || 0;
-    const aqiLevel = getAQILevel(aqi);
+    const aqi = data.aqi;
+    const aqiLevel = aqi === null ? { text: 'Unknown', class: 'unknown' } : getAQILevel(aqi);
     
     const html = `
         <h2>${data.city}</h2>
-        <div class="aqi-value aqi-${aqiLevel.class}">${Math.round(aqi)}</div>
+        <div class="aqi-value aqi-${aqiLevel.class}">${aqi === null ? '–' : Math.round(aqi)}</div>
         <p style="font-size: 1.2em;">${aqiLevel.text}</p>
         <div class="health-alert ${data.health_alert.severity === 'critical' ? 'critical' : ''}">
             <strong>${data.health_alert.level}</strong><br>
@@ -119,10 +160,11 @@ function displayForecast(data) {
 }
 
 function getAQILevel(aqi) {
+    // CPCB National AQI categories, matching the backend health alerts
     if (aqi <= 50) return { text: 'Good', class: 'good' };
-    if (aqi <= 100) return { text: 'Moderate', class: 'moderate' };
-    if (aqi <= 150) return { text: 'Unhealthy for Sensitive Groups', class: 'unhealthy' };
-    if (aqi <= 200) return { text: 'Unhealthy', class: 'very-unhealthy' };
-    if (aqi <= 300) return { text: 'Very Unhealthy', class: 'very-unhealthy' };
-    return { text: 'Hazardous', class: 'hazardous' };
+    if (aqi <= 100) return { text: 'Satisfactory', class: 'satisfactory' };
+    if (aqi <= 200) return { text: 'Moderate', class: 'moderate' };
+    if (aqi <= 300) return { text: 'Poor', class: 'poor' };
+    if (aqi <= 400) return { text: 'Very Poor', class: 'very-poor' };
+    return { text: 'Severe', class: 'severe' };
 }
@@ -0,0 +1,243 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import combinations
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import (
+    ENSEMBLE_WEIGHTS_PATH, ENSEMBLE_LATENCY_BUDGET_MS, ENSEMBLE_ACCURACY_TARGET,
+    ENSEMBLE_MAX_WORKERS, ENSEMBLE_LOAD_THRESHOLD, ENSEMBLE_LATENCY_EWMA_ALPHA,
+    ENSEMBLE_FALLBACK_TIMEOUT_MS
+)
+
+
+def fit_ensemble_weights(predictions, y_true):
+    """Learn blend weights for every subset of models on validation data.
+
+    ``predictions`` maps model name to its validation predictions. Weights
+    are non-negative least squares normalised to sum to one, and each
+    subset records the R² of its blend so the selector can trade accuracy
+    for latency without re-evaluating at serving time.
+    """
+    names = sorted(predictions)
+    y_true = np.asarray(y_true, dtype=float)
+    subsets = []
+    for size in range(1, len(names) + 1):
+        for subset in combinations(names, size):
+            X = np.column_stack([np.asarray(predictions[m], dtype=float).ravel() for m in subset])
+            if size == 1:
+                weights = np.ones(1)
+            else:
+                reg = LinearRegression(positive=True, fit_intercept=False).fit(X, y_true)
+                weights = reg.coef_
+                weights = weights / weights.sum() if weights.sum() > 0 else np.full(size, 1.0 / size)
+            subsets.append({
+                "models": list(subset),
+                "weights": [float(w) for w in weights],
+                "r2": float(r2_score(y_true, X @ weights)),
+            })
+    return subsets
+
+
+def save_ensemble_weights(subsets, latency_ms, path=ENSEMBLE_WEIGHTS_PATH):
+    with open(path, "w") as f:
+        json.dump({"subsets": subsets, "latency_ms": latency_ms}, f, indent=2)
+
+
+class LatencyTracker:
+    """Thread-safe exponentially weighted moving average of model latency."""
+
+    def __init__(self, seed=None, alpha=ENSEMBLE_LATENCY_EWMA_ALPHA):
+        self.alpha = alpha
+        self._latency = dict(seed or {})
+        self._lock = threading.Lock()
+
+    def observe(self, model_name, latency_ms):
+        with self._lock:
+            previous = self._latency.get(model_name)
+            self._latency[model_name] = (
+                latency_ms if previous is None
+                else (1 - self.alpha) * previous + self.alpha * latency_ms
+            )
+
+    def get(self, model_name):
+        with self._lock:
+            return self._latency.get(model_name, 0.0)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._latency)
+
+
+class EnsembleSelector:
+    """Runs candidate models concurrently and blends them with learned weights.
+
+    Off-peak, the most accurate subset whose expected latency (the slowest
+    member, since members run in parallel) fits the budget is used. Once
+    ``load_threshold`` requests are in flight (by default every request
+    thread of a worker), it degrades to the cheapest subset (lowest total
+    model time) that still meets the accuracy target and runs it inline on
+    the request thread, as it also does when the shared pool has no room
+    for every member: a running member cannot be cancelled, so members are
+    never queued behind other requests' stragglers. Inline members run one
+    after another, so an inline subset must fit the budget with the sum of
+    its members' latencies. Pooled members that miss the deadline are
+    dropped from the blend. Latency is measured from submission to result,
+    queueing included.
+    """
+
+    def __init__(self, predictor, weights_path=ENSEMBLE_WEIGHTS_PATH,
+                 latency_budget_ms=ENSEMBLE_LATENCY_BUDGET_MS,
+                 accuracy_target=ENSEMBLE_ACCURACY_TARGET,
+                 max_workers=ENSEMBLE_MAX_WORKERS,
+                 load_threshold=ENSEMBLE_LOAD_THRESHOLD,
+                 fallback_timeout_ms=ENSEMBLE_FALLBACK_TIMEOUT_MS):
+        self.predictor = predictor
+        self.latency_budget_ms = latency_budget_ms
+        self.accuracy_target = accuracy_target
+        self.max_workers = max_workers
+        self.load_threshold = load_threshold
+        self.fallback_timeout_ms = fallback_timeout_ms
+
+        with open(weights_path, "r") as f:
+            config = json.load(f)
+        self.subsets = config["subsets"]
+        self.latency = LatencyTracker(seed=config.get("latency_ms"))
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._in_flight = 0
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def in_flight(self):
+        with self._lock:
+            return self._in_flight
+
+    def choose_subset(self, in_flight=None, inline=None):
+        in_flight = self.in_flight() if in_flight is None else in_flight
+        degraded = in_flight >= self.load_threshold
+        inline = degraded if inline is None else inline
+        latency = self.latency.snapshot()
+
+        def expected(subset):
+            return max(latency.get(m, 0.0) for m in subset["models"])
+
+        def cost(subset):
+            return sum(latency.get(m, 0.0) for m in subset["models"])
+
+        duration = cost if inline else expected
+        feasible = [
+            s for s in self.subsets
+            if s["r2"] >= self.accuracy_target and duration(s) <= self.latency_budget_ms
+        ]
+        if not feasible:
+            # Nothing meets both targets: guarantee the response time instead
+            singles = [s for s in self.subsets if len(s["models"]) == 1]
+            return min(singles, key=cost)
+
+        if degraded:
+            return min(feasible, key=lambda s: (cost(s), -s["r2"]))
+        return max(feasible, key=lambda s: (s["r2"], -cost(s)))
+
+    def _timed_predict(self, model_name, features, submitted):
+        prediction = np.asarray(self.predictor.predict(features, model_name), dtype=float).ravel()
+        self.latency.observe(model_name, (time.perf_counter() - submitted) * 1000)
+        return prediction
+
+    def _pooled_predict(self, model_name, features, submitted):
+        try:
+            return self._timed_predict(model_name, features, submitted)
+        finally:
+            with self._lock:
+                self._busy -= 1
+
+    def _reserve_pool(self, members):
+        # All members must start immediately or none are pooled
+        with self._lock:
+            if self._busy + members > self.max_workers:
+                return False
+            self._busy += members
+            return True
+
+    def _run_pooled(self, members, features):
+        submitted = time.perf_counter()
+        futures = {
+            self._executor.submit(self._pooled_predict, name, features, submitted): (name, weight)
+            for name, weight in members
+        }
+
+        done, pending = wait(futures, timeout=self.latency_budget_ms / 1000)
+        if not done:
+            # Prefer a late answer over none, but only for a bounded time
+            done, pending = wait(futures, timeout=self.fallback_timeout_ms / 1000,
+                                 return_when=FIRST_COMPLETED)
+        if not done:
+            raise TimeoutError(
+                f"No ensemble member finished within "
+                f"{self.latency_budget_ms + self.fallback_timeout_ms} ms")
+
+        # A straggler only reports its latency once it finishes; record the
+        # time it has already taken so it stops being picked straight away
+        elapsed_ms = (time.perf_counter() - submitted) * 1000
+        for future in pending:
+            self.latency.observe(futures[future][0], elapsed_ms)
+
+        results = [(futures[f], f.result()) for f in done if f.exception() is None]
+        if not results:
+            raise next(f.exception() for f in done)
+        return results, [futures[f][0] for f in pending]
+
+    def _run_inline(self, members, features):
+        results = [
+            ((name, weight), self._timed_predict(name, features, time.perf_counter()))
+            for name, weight in members
+        ]
+        return results, []
+
+    def predict(self, features):
+        """Return (blended prediction, info about the models actually used)."""
+        with self._lock:
+            self._in_flight += 1
+            in_flight = self._in_flight
+        try:
+            subset = self.choose_subset(in_flight)
+            degraded = in_flight >= self.load_threshold
+            members = list(zip(subset["models"], subset["weights"]))
+            started = time.perf_counter()
+
+            inline = degraded or len(members) == 1 or not self._reserve_pool(len(members))
+            if inline and not degraded and len(members) > 1:
+                # The pool is full: pick again for members that run back to back
+                subset = self.choose_subset(in_flight, inline=True)
+                members = list(zip(subset["models"], subset["weights"]))
+            if inline:
+                results, dropped = self._run_inline(members, features)
+            else:
+                results, dropped = self._run_pooled(members, features)
+
+            weights = np.array([weight for (_, weight), _ in results])
+            weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(results), 1.0 / len(results))
+            blended = np.column_stack([values for _, values in results]) @ weights
+
+            return blended, {
+                "models": [name for (name, _), _ in results],
+                "weights": [float(w) for w in weights],
+                "dropped": dropped,
+                "subset_r2": subset["r2"],
+                "degraded": degraded,
+                "inline": inline,
+                "latency_ms": (time.perf_counter() - started) * 1000,
+            }
+        finally:
+            with self._lock:
+                self._in_flight -= 1
@@ -0,0 +1,247 @@
+import sqlite3
+import numpy as np
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import (
+    TARGET_R2, TARGET_RMSE, TARGET_MAE, ONLINE_EVAL_DECAY, DRIFT_RMSE_RATIO,
+    DRIFT_MIN_SAMPLES, FORECAST_LOG_RETENTION_DAYS
+)
+
+HOUR_FORMAT = "%Y-%m-%dT%H:00:00"
+SUM_FIELDS = ["n", "sum_err", "sum_abs", "sum_sq", "sum_y", "sum_y2"]
+
+
+class StreamingMetrics:
+    """Exponentially decayed sufficient statistics for R², RMSE and MAE.
+
+    Every observation multiplies the existing sums by ``decay`` before being
+    added, so memory and update cost are O(1) and old errors fade out.
+    """
+
+    def __init__(self, n=0.0, sum_err=0.0, sum_abs=0.0, sum_sq=0.0, sum_y=0.0, sum_y2=0.0):
+        self.n = n
+        self.sum_err = sum_err
+        self.sum_abs = sum_abs
+        self.sum_sq = sum_sq
+        self.sum_y = sum_y
+        self.sum_y2 = sum_y2
+
+    def update(self, y_true, y_pred, decay=ONLINE_EVAL_DECAY):
+        y_true = np.asarray(y_true, dtype=float)
+        err = y_true - np.asarray(y_pred, dtype=float)
+        k = len(y_true)
+        if k == 0:
+            return self
+
+        # Weight of the i-th new value after the remaining k-1-i decays
+        weights = decay ** np.arange(k - 1, -1, -1, dtype=float)
+        carry = decay ** k
+        self.n = self.n * carry + weights.sum()
+        self.sum_err = self.sum_err * carry + np.dot(weights, err)
+        self.sum_abs = self.sum_abs * carry + np.dot(weights, np.abs(err))
+        self.sum_sq = self.sum_sq * carry + np.dot(weights, err ** 2)
+        self.sum_y = self.sum_y * carry + np.dot(weights, y_true)
+        self.sum_y2 = self.sum_y2 * carry + np.dot(weights, y_true ** 2)
+        return self
+
+    def merge(self, other):
+        for field in SUM_FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        return self
+
+    def as_row(self):
+        return tuple(float(getattr(self, field)) for field in SUM_FIELDS)
+
+    def to_dict(self):
+        if self.n <= 0:
+            return {"n": 0.0, "r2": None, "rmse": None, "mae": None, "bias": None}
+        sst = self.sum_y2 - self.sum_y ** 2 / self.n
+        return {
+            "n": round(float(self.n), 2),
+            "r2": float(1 - self.sum_sq / sst) if sst > 0 else None,
+            "rmse": float(np.sqrt(self.sum_sq / self.n)),
+            "mae": float(self.sum_abs / self.n),
+            "bias": float(self.sum_err / self.n),
+        }
+
+
+class OnlineEvaluator:
+    """Scores stored forecasts against reconciled actuals as they arrive.
+
+    Forecasts are logged per (model, city, horizon, target hour). Each
+    ``evaluate`` call joins only the unresolved forecasts against aqi_hourly,
+    folds the matches into per-(model, city, horizon) StreamingMetrics rows
+    and deletes them, so history is never re-scanned.
+    """
+
+    def __init__(self, db_path, decay=ONLINE_EVAL_DECAY):
+        self.db_path = db_path
+        self.decay = decay
+        self.ensure_tables()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def ensure_tables(self):
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS forecast_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                model TEXT NOT NULL,
+                city TEXT NOT NULL,
+                horizon INTEGER NOT NULL,
+                issued_at TEXT NOT NULL,
+                target_time TEXT NOT NULL,
+                predicted REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_forecast_log_target
+                ON forecast_log (city, target_time);
+            CREATE TABLE IF NOT EXISTS model_performance_live (
+                model TEXT NOT NULL,
+                city TEXT NOT NULL,
+                horizon INTEGER NOT NULL,
+                n REAL NOT NULL,
+                sum_err REAL NOT NULL,
+                sum_abs REAL NOT NULL,
+                sum_sq REAL NOT NULL,
+                sum_y REAL NOT NULL,
+                sum_y2 REAL NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (model, city, horizon)
+            );
+        """)
+        conn.commit()
+        conn.close()
+
+    def record_forecast(self, model, city, predictions, issued_at=None):
+        """Log an hourly forecast; predictions[0] is horizon 1."""
+        issued_at = issued_at or datetime.now()
+        base = issued_at.replace(minute=0, second=0, microsecond=0)
+        rows = [
+            (model, city, horizon, issued_at.isoformat(),
+             (base + timedelta(hours=horizon)).strftime(HOUR_FORMAT), float(value))
+            for horizon, value in enumerate(predictions, start=1)
+        ]
+        conn = self._connect()
+        # Several ingest cycles per hour must not score the same forecast twice
+        inserted = conn.executemany("""
+            INSERT INTO forecast_log (model, city, horizon, issued_at, target_time, predicted)
+            SELECT ?1, ?2, ?3, ?4, ?5, ?6
+            WHERE NOT EXISTS (
+                SELECT 1 FROM forecast_log
+                WHERE city = ?2 AND target_time = ?5 AND model = ?1 AND horizon = ?3
+            )
+        """, rows).rowcount
+        conn.commit()
+        conn.close()
+        return inserted
+
+    def evaluate(self, now=None):
+        now = now or datetime.now()
+        conn = self._connect()
+        cursor = conn.cursor()
+        # Only completed hours are scored; the current hour's row may still change
+        matched = cursor.execute("""
+            SELECT f.id, f.model, f.city, f.horizon, f.predicted, h.aqi
+            FROM forecast_log f
+            JOIN aqi_hourly h ON h.city = f.city AND h.timestamp = f.target_time
+            WHERE h.aqi IS NOT NULL AND f.target_time < ?
+            ORDER BY f.target_time
+        """, (now.strftime(HOUR_FORMAT),)).fetchall()
+
+        groups = {}
+        for _, model, city, horizon, predicted, actual in matched:
+            pairs = groups.setdefault((model, city, horizon), ([], []))
+            pairs[0].append(actual)
+            pairs[1].append(predicted)
+
+        for (model, city, horizon), (actuals, predicted) in groups.items():
+            row = cursor.execute(f"""
+                SELECT {', '.join(SUM_FIELDS)} FROM model_performance_live
+                WHERE model = ? AND city = ? AND horizon = ?
+            """, (model, city, horizon)).fetchone()
+            metrics = StreamingMetrics(*row) if row else StreamingMetrics()
+            metrics.update(actuals, predicted, self.decay)
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO model_performance_live
+                (model, city, horizon, {', '.join(SUM_FIELDS)}, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (model, city, horizon, *metrics.as_row(), now.isoformat()))
+
+        cursor.executemany("DELETE FROM forecast_log WHERE id = ?", [(m[0],) for m in matched])
+        # Forecasts whose actual never arrived cannot be scored any more
+        cutoff = (now - timedelta(days=FORECAST_LOG_RETENTION_DAYS)).strftime(HOUR_FORMAT)
+        cursor.execute("DELETE FROM forecast_log WHERE target_time < ?", (cutoff,))
+        conn.commit()
+        conn.close()
+        return len(matched)
+
+    def summary(self, baseline=None):
+        """Rolling metrics per model, model/city and model/horizon, with drift alerts.
+
+        ``baseline`` is the training-time metrics.json content, used to flag
+        models whose live RMSE has grown beyond DRIFT_RMSE_RATIO times it.
+        """
+        conn = self._connect()
+        rows = conn.execute(f"""
+            SELECT model, city, horizon, {', '.join(SUM_FIELDS)}, updated_at
+            FROM model_performance_live
+        """).fetchall()
+        conn.close()
+
+        by_model, by_city, by_horizon = {}, {}, {}
+        last_updated = None
+        for model, city, horizon, *sums, updated_at in rows:
+            cell = StreamingMetrics(*sums)
+            by_model.setdefault(model, StreamingMetrics()).merge(cell)
+            by_city.setdefault(model, {}).setdefault(city, StreamingMetrics()).merge(cell)
+            by_horizon.setdefault(model, {}).setdefault(horizon, StreamingMetrics()).merge(cell)
+            last_updated = max(last_updated or updated_at, updated_at)
+
+        models = {name: m.to_dict() for name, m in by_model.items()}
+        return {
+            "updated_at": last_updated,
+            "models": models,
+            "by_city": {
+                name: {city: m.to_dict() for city, m in cities.items()}
+                for name, cities in by_city.items()
+            },
+            "by_horizon": {
+                name: {str(h): m.to_dict() for h, m in sorted(horizons.items())}
+                for name, horizons in by_horizon.items()
+            },
+            "alerts": self.drift_alerts(models, baseline or {}),
+        }
+
+    @staticmethod
+    def drift_alerts(models, baseline):
+        alerts = []
+        for name, live in models.items():
+            if live["n"] < DRIFT_MIN_SAMPLES:
+                continue
+            trained = baseline.get(name, {})
+            if trained.get("rmse") and live["rmse"] > trained["rmse"] * DRIFT_RMSE_RATIO:
+                alerts.append({
+                    "model": name, "metric": "rmse", "severity": "high",
+                    "message": f"Live RMSE {live['rmse']:.2f} exceeds {DRIFT_RMSE_RATIO}x "
+                               f"training RMSE {trained['rmse']:.2f}"
+                })
+            if live["r2"] is not None and live["r2"] < TARGET_R2:
+                alerts.append({
+                    "model": name, "metric": "r2", "severity": "medium",
+                    "message": f"Live R² {live['r2']:.3f} below target {TARGET_R2}"
+                })
+            if live["rmse"] > TARGET_RMSE or live["mae"] > TARGET_MAE:
+                alerts.append({
+                    "model": name, "metric": "error", "severity": "medium",
+                    "message": f"Live RMSE {live['rmse']:.2f} / MAE {live['mae']:.2f} above "
+                               f"targets {TARGET_RMSE} / {TARGET_MAE}"
+                })
+        return alerts
@@ -1,30 +1,68 @@
 import pandas as pd
 import numpy as np
 import joblib
-from tensorflow import keras
 import json
+import threading
+from dataclasses import dataclass, asdict
 from datetime import datetime
 import sqlite3
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config.config import DRIFT_MIN_SAMPLES, ENSEMBLE_WEIGHTS_PATH
+from inference.model_selector import EnsembleSelector
+from preprocessing.feature_engineering import FeatureEngineering
+from preprocessing.aqi_calculator import NationalAQICalculator
 
 class AQIPredictor:
     def __init__(self):
         self.lr_model = joblib.load("saved_models/linear_regression_model.pkl")
         self.rf_model = joblib.load("saved_models/random_forest_model.pkl")
         self.xgb_model = joblib.load("saved_models/xgboost_model.pkl")
-        self.lstm_model = keras.models.load_model("saved_models/lstm_model.h5")
+        self.lstm_model = None
+        self._lstm_lock = threading.Lock()
         
         with open("saved_models/metrics.json", "r") as f:
             self.metrics = json.load(f)
         
-        self.best_model_name = max(self.metrics.items(), key=lambda x: x['r2'])
-        self.best_model = self._get_model(self.best_model_name)
+        self.best_model_name = max(self.metrics, key=lambda name: self.metrics[name]['r2'])
+        
+        self.selector = None
+        if os.path.exists(ENSEMBLE_WEIGHTS_PATH):
+            self.selector = EnsembleSelector(self)
+    
+    def refresh_best_model(self, live_models, min_samples=DRIFT_MIN_SAMPLES):
+        # Prefer live R² once at least two models have enough scored
+        # forecasts to compare; otherwise keep the training-time choice
+        scored = {
+            name: m for name, m in live_models.items()
+            if name in self.metrics and m["n"] >= min_samples and m["r2"] is not None
+        }
+        if len(scored) > 1:
+            self.best_model_name = max(scored, key=lambda name: scored[name]["r2"])
+        return self.best_model_name
+    
+    def load_lstm(self):
+        # TensorFlow is not fork-safe, so it is imported and loaded on first
+        # use (or from gunicorn's post_fork) in the process serving requests
+        with self._lstm_lock:
+            if self.lstm_model is None:
+                from tensorflow import keras
+                self.lstm_model = keras.models.load_model("saved_models/lstm_model.h5")
+        return self.lstm_model
     
     def _get_model(self, model_name):
+        if model_name == "lstm":
+            return self.load_lstm()
         models = {
             "linear_regression": self.lr_model,
             "random_forest": self.rf_model,
             "xgboost": self.xgb_model,
-            "lstm": self.lstm_model
         }
         return models.get(model_name)
     
@@ -35,67 +73,122 @@ class AQIPredictor:
         model = self._get_model(model_name)
         
         if model_name == "lstm":
-            features_reshaped = features.values.reshape((features.shape, features.shape, 1))
+            features_reshaped = features.values.reshape((features.shape[0], features.shape[1], 1))
             prediction = model.predict(features_reshaped, verbose=0)
         else:
             prediction = model.predict(features)
         
         return prediction
     
-    def get_model_performance(self):
+    def predict_all(self, features):
+        return {
+            model_name: np.asarray(self.predict(features, model_name), dtype=float).ravel()
+            for model_name in self.metrics
+        }
+    
+    def predict_ensemble(self, features):
+        # Falls back to the single best model until ensemble weights are trained
+        if self.selector is None:
+            prediction = np.asarray(self.predict(features), dtype=float).ravel()
+            return prediction, {"models": [self.best_model_name], "weights": [1.0]}
+        return self.selector.predict(features)
+    
+    def forecast(self, features, timestamps, hours):
+        # The models predict one hour ahead (create_target_variable); longer
+        # horizons feed each blended hour back in as the current AQI.
+        # Returns (cities x hours array, info for the first hour, the one scored live)
+        feature_engineering = FeatureEngineering()
+        steps, info = [], None
+        for _ in range(hours):
+            predicted, step_info = self.predict_ensemble(features)
+            predicted = np.maximum(0, predicted)
+            steps.append(predicted)
+            info = info or step_info
+            features, timestamps = feature_engineering.roll_forward(features, timestamps, predicted)
+        return np.column_stack(steps).round(2), info
+    
+    def get_model_performance(self, live=None):
         return {
             "timestamp": datetime.now().isoformat(),
             "models": self.metrics,
             "best_model": {
                 "name": self.best_model_name,
                 "metrics": self.metrics[self.best_model_name]
-            }
+            },
+            "live": live,
+            "ensemble_latency_ms": self.selector.latency.snapshot() if self.selector else None
         }
 
+@dataclass(frozen=True)
+class HealthAlert:
+    level: str
+    severity: str
+    message: str
+    recommendation: str
+
 class HealthAlerts:
-    @staticmethod
-    def get_health_message(aqi):
-        aqi = float(aqi)
-        
-        if aqi <= 50:
-            return {
-                "level": "Good",
-                "severity": "low",
-                "message": "Air quality is satisfactory!",
-                "recommendation": "Enjoy outdoor activities!"
-            }
-        elif aqi <= 100:
-            return {
-                "level": "Moderate",
-                "severity": "low",
-                "message": "Air quality is acceptable.",
-                "recommendation": "Sensitive groups should limit outdoor activities."
-            }
-        elif aqi <= 150:
-            return {
-                "level": "Unhealthy for Sensitive Groups",
-                "severity": "medium",
-                "message": "Members of sensitive groups may experience health effects.",
-                "recommendation": "Sensitive groups should limit outdoor activities."
-            }
-        elif aqi <= 200:
-            return {
-                "level": "Unhealthy",
-                "severity": "high",
-                "message": "Health alert! Everyone may experience health effects.",
-                "recommendation": "Limit outdoor activities. Wear N95 masks if going outside."
-            }
-        elif aqi <= 300:
-            return {
-                "level": "Very Unhealthy",
-                "severity": "critical",
-                "message": "Health warning! Serious health effects possible.",
-                "recommendation": "Avoid outdoor activities. Stay indoors."
-            }
-        else:
-            return {
-                "level": "Hazardous",
-                "severity": "critical",
-                "message": "Health alarm! It's unsafe to go outside.",
-                "recommendation": "Stay indoors. Close all windows and doors."
-            }
+    # One alert per CPCB National AQI category (Good .. Severe), in band
+    # order; the trailing entry is picked by the -1 index for missing AQI
+    ALERTS = (
+        HealthAlert(
+            level="Good",
+            severity="low",
+            message="Minimal impact.",
+            recommendation="Enjoy outdoor activities!"
+        ),
+        HealthAlert(
+            level="Satisfactory",
+            severity="low",
+            message="Minor breathing discomfort to sensitive people.",
+            recommendation="Sensitive groups should limit prolonged outdoor exertion."
+        ),
+        HealthAlert(
+            level="Moderate",
+            severity="medium",
+            message="Breathing discomfort to people with lung or heart disease, children and older adults.",
+            recommendation="Sensitive groups should limit outdoor activities."
+        ),
+        HealthAlert(
+            level="Poor",
+            severity="high",
+            message="Breathing discomfort to most people on prolonged exposure.",
+            recommendation="Limit outdoor activities. Wear N95 masks if going outside."
+        ),
+        HealthAlert(
+            level="Very Poor",
+            severity="critical",
+            message="Respiratory illness on prolonged exposure.",
+            recommendation="Avoid outdoor activities. Stay indoors."
+        ),
+        HealthAlert(
+            level="Severe",
+            severity="critical",
+            message="Affects healthy people and seriously impacts those with existing diseases.",
+            recommendation="Stay indoors. Close all windows and doors."
+        ),
+        HealthAlert(
+            level="Unknown",
+            severity="low",
+            message="AQI is not available for this reading.",
+            recommendation="Check again after the next update."
+        ),
+    )
+    
+    _LEVELS = np.array([alert.level for alert in ALERTS], dtype=object)
+    
+    @classmethod
+    def classify(cls, aqi):
+        return NationalAQICalculator.categorize(aqi)
+    
+    @classmethod
+    def alerts_for(cls, aqi):
+        return [cls.ALERTS[i] for i in np.atleast_1d(cls.classify(aqi))]
+    
+    @classmethod
+    def levels_for(cls, aqi):
+        return cls._LEVELS[cls.classify(aqi)]
+    
+    @classmethod
+    def get_health_message(cls, aqi):
+        # Fresh dict per call: the frozen alert is serialized at the edge
+        return asdict(cls.ALERTS[int(cls.classify(float(aqi)))])
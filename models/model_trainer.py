@@ -11,9 +11,20 @@ from tensorflow.keras.layers import LSTM, Dense, Dropout
 from tensorflow.keras.callbacks import EarlyStopping
 import joblib
 import json
+import time
+import sys
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from inference.model_selector import fit_ensemble_weights, save_ensemble_weights
+from config.config import CITIES
+
 class ModelTrainer:
     def __init__(self):
         self.models = {}
@@ -83,11 +94,11 @@ class ModelTrainer:
     
     def train_lstm(self, X_train, y_train, X_val, y_val):
         print("Training LSTM...")
-        X_train_lstm = X_train.values.reshape((X_train.shape, X_train.shape, 1))
-        X_val_lstm = X_val.values.reshape((X_val.shape, X_val.shape, 1))
+        X_train_lstm = X_train.values.reshape((X_train.shape[0], X_train.shape[1], 1))
+        X_val_lstm = X_val.values.reshape((X_val.shape[0], X_val.shape[1], 1))
         
         model = Sequential([
-            LSTM(64, activation='relu', input_shape=(X_train_lstm.shape, 1)),
+            LSTM(64, activation='relu', input_shape=(X_train_lstm.shape[1], 1)),
             Dropout(0.2),
             Dense(32, activation='relu'),
             Dropout(0.2),
@@ -111,9 +122,12 @@ class ModelTrainer:
         print(f"LSTM - R²: {r2:.4f}, RMSE: {rmse:.4f}, MAE: {mae:.4f}")
         return model, metrics
     
-    def train_all_models(self, csv_path):
+    def train_all_models(self, csv_path=None, df=None):
+        # df lets callers pass a feature matrix built through FeatureCache
+        # instead of round-tripping it through CSV
         print("Loading and preparing data...")
-        df = self.load_features(csv_path)
+        if df is None:
+            df = self.load_features(csv_path)
         X_train, X_val, X_test, y_train, y_val, y_test = self.prepare_data(df)
         
         lr_model, lr_metrics = self.train_linear_regression(X_train, y_train, X_val, y_val)
@@ -136,6 +150,7 @@ class ModelTrainer:
         }
         
         self.save_models()
+        self.train_ensemble(X_val, y_val)
         self.print_summary()
         return self.models, self.performance_metrics
     
@@ -151,6 +166,31 @@ class ModelTrainer:
         
         print("Models saved successfully!")
     
+    def train_ensemble(self, X_val, y_val):
+        print("Fitting ensemble weights...")
+        predictions = {}
+        latency_ms = {}
+        for model_name, model in self.models.items():
+            if model_name == "lstm":
+                X = X_val.values.reshape((X_val.shape[0], X_val.shape[1], 1))
+                run = lambda batch, model=model: model.predict(batch, verbose=0).flatten()
+            else:
+                X = X_val
+                run = model.predict
+            predictions[model_name] = run(X)
+            
+            # Latency of a serving-sized batch (one row per city) seeds the
+            # selector until live measurements arrive
+            started = time.perf_counter()
+            run(X[:len(CITIES)])
+            latency_ms[model_name] = (time.perf_counter() - started) * 1000
+        
+        subsets = fit_ensemble_weights(predictions, y_val)
+        save_ensemble_weights(subsets, latency_ms)
+        best = max(subsets, key=lambda s: s["r2"])
+        print(f"Best ensemble: {best['models']} (R² = {best['r2']:.4f})")
+        return subsets
+    
     def print_summary(self):
         print("\n" + "="*60)
         print("MODEL PERFORMANCE SUMMARY")
@@ -162,8 +202,8 @@ class ModelTrainer:
             print(f"  RMSE: {metrics['rmse']:.4f}")
             print(f"  MAE: {metrics['mae']:.4f}")
         
-        best_model = max(self.performance_metrics.items(), key=lambda x: x['r2'])
-        print(f"\n✓ Best Model: {best_model} (R² = {best_model['r2']:.4f})")
+        best_model = max(self.performance_metrics, key=lambda name: self.performance_metrics[name]['r2'])
+        print(f"\n✓ Best Model: {best_model} (R² = {self.performance_metrics[best_model]['r2']:.4f})")
         print("="*60)
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# CPCB National AQI breakpoints: (concentration lower, concentration upper)
+# per band, paired with INDEX_BANDS. Units are µg/m³ except CO (mg/m³).
+# The open-ended top band is capped at a conventional upper concentration.
+BREAKPOINTS = {
+    "PM2.5": [(0, 30), (30, 60), (60, 90), (90, 120), (120, 250), (250, 500)],
+    "PM10": [(0, 50), (50, 100), (100, 250), (250, 350), (350, 430), (430, 600)],
+    "NO2": [(0, 40), (40, 80), (80, 180), (180, 280), (280, 400), (400, 800)],
+    "SO2": [(0, 40), (40, 80), (80, 380), (380, 800), (800, 1600), (1600, 2400)],
+    "CO": [(0, 1.0), (1.0, 2.0), (2.0, 10), (10, 17), (17, 34), (34, 50)],
+    "O3": [(0, 50), (50, 100), (100, 168), (168, 208), (208, 748), (748, 1000)],
+}
+
+INDEX_BANDS = [(0, 50), (50, 100), (100, 200), (200, 300), (300, 400), (400, 500)]
+
+CATEGORIES = ("Good", "Satisfactory", "Moderate", "Poor", "Very Poor", "Severe")
+CATEGORY_UPPER_BOUNDS = np.array([50, 100, 200, 300, 400], dtype=float)
+
+# Column names used for the same pollutants in the aqi_data table
+COLUMN_MAP = {
+    "PM2.5": "pm2_5", "PM10": "pm10", "NO2": "no2",
+    "SO2": "so2", "CO": "co", "O3": "o3",
+}
+
+PM_POLLUTANTS = ("PM2.5", "PM10")
+
+
+class NationalAQICalculator:
+    """Vectorized Indian National AQI (CPCB) from pollutant concentrations.
+
+    Each sub-index is a piecewise-linear interpolation over the breakpoint
+    table, located with ``np.searchsorted``; the AQI is the maximum
+    sub-index. CPCB requires at least ``min_pollutants`` valid sub-indices,
+    one of which must be PM2.5 or PM10; rows failing that are NaN.
+    """
+
+    def __init__(self, min_pollutants=3, require_pm=True):
+        self.min_pollutants = min_pollutants
+        self.require_pm = require_pm
+        self._tables = {}
+        i_lo = np.array([lo for lo, _ in INDEX_BANDS], dtype=float)
+        i_hi = np.array([hi for _, hi in INDEX_BANDS], dtype=float)
+        for pollutant, bands in BREAKPOINTS.items():
+            c_lo = np.array([lo for lo, _ in bands], dtype=float)
+            c_hi = np.array([hi for _, hi in bands], dtype=float)
+            slope = (i_hi - i_lo) / (c_hi - c_lo)
+            self._tables[pollutant] = (c_lo, c_hi, i_lo, slope)
+
+    def sub_index(self, pollutant, concentrations):
+        c_lo, c_hi, i_lo, slope = self._tables[pollutant]
+        conc = np.clip(np.asarray(concentrations, dtype=float), 0, c_hi[-1])
+        band = np.minimum(np.searchsorted(c_hi, conc, side='left'), len(c_hi) - 1)
+        return i_lo[band] + (conc - c_lo[band]) * slope[band]
+
+    def compute(self, concentrations, co_scale=1.0):
+        """Compute AQI from a mapping of pollutant name -> concentration array.
+
+        ``co_scale`` converts the supplied CO values to mg/m³ (e.g. 0.001
+        for providers reporting µg/m³). Missing values should be NaN.
+        """
+        sub_indices = []
+        has_pm = None
+        for pollutant in BREAKPOINTS:
+            if pollutant not in concentrations:
+                continue
+            values = np.asarray(concentrations[pollutant], dtype=float)
+            if pollutant == "CO":
+                values = values * co_scale
+            sub = self.sub_index(pollutant, values)
+            sub_indices.append(sub)
+            if pollutant in PM_POLLUTANTS:
+                valid = ~np.isnan(sub)
+                has_pm = valid if has_pm is None else (has_pm | valid)
+
+        if not sub_indices:
+            return np.array([], dtype=float)
+
+        stacked = np.vstack(sub_indices)
+        aqi = np.fmax.reduce(stacked, axis=0)
+
+        insufficient = (~np.isnan(stacked)).sum(axis=0) < self.min_pollutants
+        if self.require_pm:
+            insufficient |= ~has_pm if has_pm is not None else True
+        aqi[insufficient] = np.nan
+        return np.round(aqi)
+
+    def compute_dataframe(self, df, co_scale=1.0):
+        concentrations = {
+            pollutant: df[column].to_numpy(dtype=float)
+            for pollutant, column in COLUMN_MAP.items() if column in df.columns
+        }
+        return pd.Series(self.compute(concentrations, co_scale), index=df.index, name='aqi')
+
+    def compute_records(self, records, co_scale=1.0):
+        concentrations = {
+            pollutant: np.array(
+                [np.nan if r.get(pollutant) is None else r.get(pollutant) for r in records],
+                dtype=float
+            )
+            for pollutant in BREAKPOINTS
+        }
+        return self.compute(concentrations, co_scale)
+
+    @staticmethod
+    def categorize(aqi):
+        """Return CPCB category indices (0=Good .. 5=Severe, -1 for NaN)."""
+        aqi = np.asarray(aqi, dtype=float)
+        index = np.searchsorted(CATEGORY_UPPER_BOUNDS, aqi, side='left')
+        return np.where(np.isnan(aqi), -1, index)
+
+    @staticmethod
+    def category_names(aqi):
+        names = np.array(CATEGORIES + ("Unknown",), dtype=object)
+        return names[NationalAQICalculator.categorize(aqi)]
@@ -1,53 +1,89 @@
+import math
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
+import sqlite3
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+# Readings are carried forward at most this many hours before falling back
+FILL_LIMIT_HOURS = 6
+# Trailing window the outlier bounds are computed over
+OUTLIER_WINDOW_HOURS = 48
+# Raw rows before a row that its cleaned values can depend on
+CLEANING_LOOKBACK_HOURS = FILL_LIMIT_HOURS + OUTLIER_WINDOW_HOURS - 1
+# Fallback for readings with nothing recent to carry forward
+FILL_DEFAULTS = {
+    'pm2_5': 60.0, 'pm10': 100.0, 'no2': 30.0, 'so2': 10.0, 'co': 1.0, 'o3': 40.0,
+    'aqi': 100.0, 'temperature': 25.0, 'humidity': 60.0, 'pressure': 1013.0, 'wind_speed': 3.0,
+}
+
 class FeatureEngineering:
     def __init__(self):
         self.scaler = StandardScaler()
         self.min_max_scaler = MinMaxScaler()
     
-    def load_and_prepare_data(self, csv_path):
+    def load_and_prepare_data(self, csv_path, clean=True):
         df = pd.read_csv(csv_path)
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         df = df.sort_values(['city', 'timestamp']).reset_index(drop=True)
-        df = self.handle_missing_values(df)
-        df = self.remove_outliers(df)
+        if clean:
+            df = self.handle_missing_values(df)
+            df = self.remove_outliers(df)
         return df
     
-    def handle_missing_values(self, df):
-        for city in df['city'].unique():
-            city_mask = df['city'] == city
-            pollutants = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3']
-            for pollutant in pollutants:
-                df.loc[city_mask, pollutant] = df.loc[city_mask, pollutant].fillna(
-                    method='ffill').fillna(method='bfill').interpolate()
-            
-            weather = ['temperature', 'humidity', 'pressure', 'wind_speed']
-            for feature in weather:
-                df.loc[city_mask, feature] = df.loc[city_mask, feature].fillna(
-                    method='ffill').fillna(method='bfill').interpolate()
+    def load_canonical_data(self, db_path, days=None, clean=True):
+        # Reads the reconciled aqi_hourly table: one dense row per city/hour
+        query = "SELECT * FROM aqi_hourly"
+        params = ()
+        if days is not None:
+            query += " WHERE timestamp >= ?"
+            params = ((datetime.now() - timedelta(days=days)).strftime("%Y-%m-%dT%H:00:00"),)
+        
+        conn = sqlite3.connect(db_path)
+        df = pd.read_sql_query(query, conn, params=params)
+        conn.close()
         
-        df = df.fillna(df.mean(numeric_only=True))
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        df = df.drop(columns=['sources', 'n_readings'])
+        df = df.sort_values(['city', 'timestamp']).reset_index(drop=True)
+        if clean:
+            df = self.handle_missing_values(df)
+            df = self.remove_outliers(df)
+        return df
+    
+    def handle_missing_values(self, df):
+        # Carry readings forward a bounded number of hours and fall back to
+        # fixed values, so a row's cleaned value depends only on the
+        # CLEANING_LOOKBACK_HOURS rows before it (never on later rows or
+        # dataset-wide statistics) and a window cleans like the full history
+        columns = [c for c in FILL_DEFAULTS if c in df.columns]
+        df[columns] = df.groupby('city', sort=False)[columns].ffill(limit=FILL_LIMIT_HOURS)
+        df = df.fillna(FILL_DEFAULTS)
         return df
     
     def remove_outliers(self, df):
+        # Readings outside 1.5 IQR of the trailing window become its median
         pollutants = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3']
         for pollutant in pollutants:
             if pollutant in df.columns:
-                Q1 = df[pollutant].quantile(0.25)
-                Q3 = df[pollutant].quantile(0.75)
+                rolling = df.groupby('city', sort=False)[pollutant].rolling(
+                    OUTLIER_WINDOW_HOURS, min_periods=1)
+                Q1 = rolling.quantile(0.25).reset_index(level=0, drop=True)
+                Q3 = rolling.quantile(0.75).reset_index(level=0, drop=True)
+                median = rolling.median().reset_index(level=0, drop=True)
                 IQR = Q3 - Q1
                 lower_bound = Q1 - 1.5 * IQR
                 upper_bound = Q3 + 1.5 * IQR
-                median = df[pollutant].median()
                 mask = (df[pollutant] < lower_bound) | (df[pollutant] > upper_bound)
-                df.loc[mask, pollutant] = median
+                df.loc[mask, pollutant] = median[mask]
         return df
     
+    def required_history_hours(self, lags=(1, 6, 24), windows=(6, 24)):
+        # Rows needed before a row for its features to match a full-history build
+        return max(list(lags) + [w - 1 for w in windows]) + CLEANING_LOOKBACK_HOURS
+    
     def extract_temporal_features(self, df):
         df['hour'] = df['timestamp'].dt.hour
         df['day_of_week'] = df['timestamp'].dt.dayofweek
@@ -72,6 +108,28 @@ class FeatureEngineering:
                     df.loc[city_mask, lag_col_name] = city_df[pollutant].shift(lag)
         return df
     
+    def load_latest_features(self, db_path, history_days=2):
+        # Feature row for the most recent hour of each city, built like the
+        # training matrix minus the target; returns (features by city, hour)
+        history_days = max(history_days, math.ceil((self.required_history_hours() + 1) / 24))
+        df = self.load_canonical_data(db_path, days=history_days)
+        df = self.extract_temporal_features(df)
+        df = self.create_lagged_features(df)
+        df = self.create_rolling_features(df)
+        latest = df.groupby('city').tail(1).set_index('city')
+        issued_at = latest['timestamp']
+        features = latest.drop(columns=[c for c in ['timestamp', 'source', 'id'] if c in latest.columns])
+        return features, issued_at
+    
+    def roll_forward(self, features, timestamps, predicted_aqi):
+        # Feature rows one hour later for recursive multi-step forecasts: the
+        # calendar features advance and the predicted AQI becomes the current
+        # one, while the last pollutant and weather readings persist
+        timestamps = timestamps + pd.Timedelta(hours=1)
+        features = features.assign(timestamp=timestamps.to_numpy(), aqi=predicted_aqi)
+        features = self.extract_temporal_features(features).drop(columns='timestamp')
+        return features, timestamps
+    
     def create_rolling_features(self, df, windows=[6, 24]):
         pollutants = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3']
         for city in df['city'].unique():
@@ -93,24 +151,47 @@ class FeatureEngineering:
         df = df.dropna(subset=['target_aqi'])
         return df
     
-    def prepare_final_dataset(self, csv_path):
+    def prepare_final_dataset(self, csv_path=None, db_path=None, cache=None):
         print("Loading data...")
-        df = self.load_and_prepare_data(csv_path)
-        print("Extracting temporal features...")
-        df = self.extract_temporal_features(df)
-        print("Creating lagged features...")
-        df = self.create_lagged_features(df)
-        print("Creating rolling features...")
-        df = self.create_rolling_features(df)
-        print("Creating target variable...")
-        df = self.create_target_variable(df)
+        # The cache cleans each partition's window itself so its keys see raw rows
+        clean = cache is None
+        if db_path is not None:
+            df = self.load_canonical_data(db_path, clean=clean)
+        else:
+            df = self.load_and_prepare_data(csv_path, clean=clean)
+        if cache is not None:
+            print("Building features from cache...")
+            df = cache.build(df)
+            print(f"Feature cache: {cache.hits} hits, {cache.misses} recomputed partitions, "
+                  f"{cache.prune()} stale blocks removed")
+        else:
+            print("Extracting temporal features...")
+            df = self.extract_temporal_features(df)
+            print("Creating lagged features...")
+            df = self.create_lagged_features(df)
+            print("Creating rolling features...")
+            df = self.create_rolling_features(df)
+            print("Creating target variable...")
+            df = self.create_target_variable(df)
         drop_cols = ['timestamp', 'source', 'id']
         df = df.drop(columns=[c for c in drop_cols if c in df.columns])
         print(f"Final dataset shape: {df.shape}")
         return df
 
 if __name__ == "__main__":
+    import os
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from config.config import DB_PATH
+    from feature_cache import FeatureCache
+    
     fe = FeatureEngineering()
-    df = fe.prepare_final_dataset("data/processed/aqi_data.csv")
+    # Train on the reconciled hourly rows once ingestion has populated them
+    if os.path.exists(DB_PATH):
+        df = fe.prepare_final_dataset(db_path=DB_PATH, cache=FeatureCache(fe))
+    else:
+        df = fe.prepare_final_dataset("data/processed/aqi_data.csv", cache=FeatureCache(fe))
     df.to_csv("data/processed/aqi_features.csv", index=False)
     print("Features saved!")
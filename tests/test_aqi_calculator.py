@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from preprocessing.aqi_calculator import NationalAQICalculator
+
+calculator = NationalAQICalculator()
+
+
+def test_pm25_band_edges():
+    sub = calculator.sub_index("PM2.5", [0, 30, 30.5, 60, 250, 1000])
+    assert sub[0] == 0
+    assert sub[1] == 50
+    assert round(sub[2]) == 51
+    assert sub[3] == 100
+    assert sub[4] == 400
+    # Concentrations beyond the table are capped at the top of the scale
+    assert sub[5] == 500
+
+
+def test_aqi_is_the_highest_sub_index():
+    aqi = calculator.compute({"PM2.5": [30], "PM10": [120], "NO2": [40]})
+    # PM10 120 sits in the 100-250 band: 100 + 20 * 100 / 150
+    assert aqi[0] == 113
+
+
+def test_too_few_pollutants_is_nan():
+    aqi = calculator.compute({"PM2.5": [80, 80], "PM10": [90, 90], "NO2": [np.nan, 20]})
+    assert np.isnan(aqi[0])
+    assert not np.isnan(aqi[1])
+
+
+def test_pm_is_required():
+    aqi = calculator.compute({"NO2": [50], "SO2": [50], "O3": [50], "PM2.5": [np.nan]})
+    assert np.isnan(aqi[0])
+    relaxed = NationalAQICalculator(require_pm=False).compute({"NO2": [50], "SO2": [50], "O3": [50]})
+    assert relaxed[0] == 62
+
+
+def test_co_scale_converts_micrograms():
+    concentrations = {"PM2.5": [10], "NO2": [10], "CO": [1500]}
+    # 1500 µg/m³ is 1.5 mg/m³: halfway through the 1-2 mg/m³ band
+    assert calculator.compute(concentrations, co_scale=0.001)[0] == 75
+    # Unscaled, the same number would be read as 1500 mg/m³
+    assert calculator.compute(concentrations)[0] == 500
+
+
+def test_records_and_dataframe_agree():
+    records = [
+        {"PM2.5": 45, "PM10": 80, "NO2": 30, "CO": None},
+        {"PM2.5": None, "PM10": None, "NO2": 30},
+    ]
+    from_records = calculator.compute_records(records)
+    df = pd.DataFrame({"pm2_5": [45, np.nan], "pm10": [80, np.nan], "no2": [30, 30]})
+    from_frame = calculator.compute_dataframe(df).to_numpy()
+    np.testing.assert_array_equal(from_records, from_frame)
+    assert from_records[0] == 80
+    assert np.isnan(from_records[1])
+
+
+def test_categories_at_band_edges():
+    names = NationalAQICalculator.category_names([50, 51, 100, 101, 200, 300, 400, 401, np.nan])
+    assert list(names) == [
+        "Good", "Satisfactory", "Satisfactory", "Moderate", "Moderate",
+        "Poor", "Very Poor", "Severe", "Unknown",
+    ]
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from preprocessing.feature_engineering import FeatureEngineering
+from preprocessing.feature_cache import FeatureCache
+
+CITIES = ["Delhi", "Mumbai"]
+POLLUTANTS = ['pm2_5', 'pm10', 'no2', 'so2', 'co', 'o3']
+WEATHER = ['temperature', 'humidity', 'pressure', 'wind_speed']
+
+
+def raw_readings(days, seed=7):
+    """Uncleaned hourly rows with gaps and spikes, like the ingested data."""
+    rng = np.random.default_rng(seed)
+    hours = pd.date_range("2026-01-01", periods=days * 24, freq="h")
+    frames = []
+    for city in CITIES:
+        df = pd.DataFrame({"city": city, "timestamp": hours})
+        for column in POLLUTANTS + WEATHER + ['aqi']:
+            values = rng.uniform(10, 200, len(hours))
+            values[rng.random(len(hours)) < 0.05] = np.nan
+            values[rng.random(len(hours)) < 0.02] *= 20
+            df[column] = values
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True).sort_values(['city', 'timestamp']).reset_index(drop=True)
+
+
+def test_appending_a_day_recomputes_two_partitions_per_city(tmp_path):
+    fe = FeatureEngineering()
+    full = raw_readings(31)
+    first = full[full['timestamp'] < pd.Timestamp("2026-01-31")].reset_index(drop=True)
+
+    FeatureCache(fe, cache_dir=str(tmp_path)).build(first)
+
+    cache = FeatureCache(fe, cache_dir=str(tmp_path))
+    cache.build(full)
+    # The new day plus the previous day, whose target now looks into it
+    assert cache.misses == 2 * len(CITIES)
+    assert cache.hits == 29 * len(CITIES)
+
+
+def test_cached_blocks_match_a_cold_build(tmp_path):
+    fe = FeatureEngineering()
+    full = raw_readings(31)
+    first = full[full['timestamp'] < pd.Timestamp("2026-01-31")].reset_index(drop=True)
+
+    FeatureCache(fe, cache_dir=str(tmp_path / "warm")).build(first)
+    warm = FeatureCache(fe, cache_dir=str(tmp_path / "warm")).build(full)
+    cold = FeatureCache(fe, cache_dir=str(tmp_path / "cold")).build(full)
+
+    pd.testing.assert_frame_equal(warm, cold)
+
+
+def test_cached_build_matches_the_uncached_pipeline(tmp_path):
+    fe = FeatureEngineering()
+    raw = raw_readings(31)
+
+    cached = FeatureCache(fe, cache_dir=str(tmp_path)).build(raw.copy())
+
+    df = fe.remove_outliers(fe.handle_missing_values(raw.copy()))
+    df = fe.extract_temporal_features(df)
+    df = fe.create_lagged_features(df)
+    df = fe.create_rolling_features(df)
+    uncached = fe.create_target_variable(df).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(cached, uncached)
+
+
+def test_prune_removes_blocks_the_last_build_did_not_use(tmp_path):
+    fe = FeatureEngineering()
+    full = raw_readings(31)
+    FeatureCache(fe, cache_dir=str(tmp_path)).build(full)
+
+    recent = full[full['timestamp'] >= pd.Timestamp("2026-01-21")].reset_index(drop=True)
+    cache = FeatureCache(fe, cache_dir=str(tmp_path))
+    cache.build(recent)
+    assert cache.prune() > 0
+    assert len(list(tmp_path.glob("*.pkl"))) == cache.hits + cache.misses
@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from inference.model_selector import EnsembleSelector
+
+features = pd.DataFrame({"aqi": [100.0, 200.0]})
+
+
+class FakePredictor:
+    """Each model returns a constant after sleeping for its latency."""
+
+    def __init__(self, outputs, delays_ms):
+        self.outputs = outputs
+        self.delays_ms = delays_ms
+
+    def predict(self, features, model_name):
+        time.sleep(self.delays_ms[model_name] / 1000)
+        return np.full(len(features), self.outputs[model_name])
+
+
+def make_selector(tmp_path, subsets, latency_ms, delays_ms=None, **kwargs):
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps({"subsets": subsets, "latency_ms": latency_ms}))
+    outputs = {"lr": 10.0, "rf": 20.0, "xgb": 30.0}
+    predictor = FakePredictor(outputs, delays_ms or {name: 0 for name in outputs})
+    kwargs.setdefault("accuracy_target", 0.8)
+    kwargs.setdefault("latency_budget_ms", 100)
+    return EnsembleSelector(predictor, weights_path=str(path), **kwargs)
+
+
+SUBSETS = [
+    {"models": ["lr"], "weights": [1.0], "r2": 0.82},
+    {"models": ["rf"], "weights": [1.0], "r2": 0.85},
+    {"models": ["xgb"], "weights": [1.0], "r2": 0.86},
+    {"models": ["lr", "rf"], "weights": [0.5, 0.5], "r2": 0.87},
+    {"models": ["rf", "xgb"], "weights": [0.5, 0.5], "r2": 0.9},
+]
+LATENCY = {"lr": 5.0, "rf": 60.0, "xgb": 70.0}
+
+
+def test_off_peak_picks_the_most_accurate_parallel_subset(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, load_threshold=4)
+    # rf + xgb take 130 ms in total but 70 ms side by side
+    assert selector.choose_subset(in_flight=1)["models"] == ["rf", "xgb"]
+
+
+def test_inline_subsets_must_fit_the_budget_back_to_back(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, load_threshold=4)
+    # rf + xgb would take 130 ms run one after the other
+    assert selector.choose_subset(in_flight=1, inline=True)["models"] == ["lr", "rf"]
+
+
+def test_degrades_to_the_cheapest_accurate_subset_under_load(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, load_threshold=4)
+    assert selector.choose_subset(in_flight=4)["models"] == ["lr"]
+
+
+def test_falls_back_to_the_fastest_single_model(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, load_threshold=4, accuracy_target=0.95)
+    assert selector.choose_subset(in_flight=1)["models"] == ["lr"]
+
+
+def test_blends_pooled_members_with_their_weights(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, load_threshold=4)
+    blended, info = selector.predict(features)
+    assert sorted(info["models"]) == ["rf", "xgb"]
+    assert not info["inline"] and not info["degraded"]
+    np.testing.assert_allclose(blended, [25.0, 25.0])
+
+
+def test_runs_inline_when_the_pool_is_full(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, load_threshold=4, max_workers=1)
+    blended, info = selector.predict(features)
+    assert info["inline"] and not info["degraded"]
+    assert info["models"] == ["lr", "rf"]
+    np.testing.assert_allclose(blended, [15.0, 15.0])
+
+
+def test_concurrent_requests_reach_the_load_threshold(tmp_path):
+    selector = make_selector(tmp_path, SUBSETS, LATENCY, delays_ms={"lr": 50, "rf": 50, "xgb": 50},
+                             load_threshold=2)
+    infos = []
+    threads = [threading.Thread(target=lambda: infos.append(selector.predict(features)[1]))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert any(info["degraded"] for info in infos)
+    assert selector.in_flight() == 0
+
+
+def test_stragglers_are_dropped_from_the_blend(tmp_path):
+    subsets = [{"models": ["lr", "rf"], "weights": [0.25, 0.75], "r2": 0.9}]
+    selector = make_selector(tmp_path, subsets, {"lr": 1.0, "rf": 1.0},
+                             delays_ms={"lr": 0, "rf": 300, "xgb": 0},
+                             latency_budget_ms=50, load_threshold=4)
+    blended, info = selector.predict(features)
+    assert info["models"] == ["lr"] and info["dropped"] == ["rf"]
+    np.testing.assert_allclose(blended, [10.0, 10.0])
+    # The straggler's elapsed time is recorded before it finishes
+    assert selector.latency.get("rf") > 1.0
+
+
+def test_times_out_when_no_member_finishes(tmp_path):
+    subsets = [{"models": ["rf", "xgb"], "weights": [0.5, 0.5], "r2": 0.9}]
+    selector = make_selector(tmp_path, subsets, {"rf": 1.0, "xgb": 1.0},
+                             delays_ms={"lr": 0, "rf": 300, "xgb": 300},
+                             latency_budget_ms=20, fallback_timeout_ms=20, load_threshold=4)
+    with pytest.raises(TimeoutError):
+        selector.predict(features)
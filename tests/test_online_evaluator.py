@@ -0,0 +1,86 @@
+import sqlite3
+import numpy as np
+from datetime import datetime
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from inference.online_evaluator import StreamingMetrics, OnlineEvaluator
+from data_fetch.reconciliation import SourceReconciler
+
+rng = np.random.default_rng(3)
+actual = rng.uniform(50, 300, 200)
+predicted = actual + rng.normal(5, 20, 200)
+
+
+def test_undecayed_metrics_match_batch_formulas():
+    metrics = StreamingMetrics().update(actual, predicted, decay=1.0).to_dict()
+    err = actual - predicted
+    assert metrics["n"] == 200
+    assert np.isclose(metrics["rmse"], np.sqrt(np.mean(err ** 2)))
+    assert np.isclose(metrics["mae"], np.mean(np.abs(err)))
+    assert np.isclose(metrics["bias"], np.mean(err))
+    r2 = 1 - np.sum(err ** 2) / np.sum((actual - actual.mean()) ** 2)
+    assert np.isclose(metrics["r2"], r2)
+
+
+def test_chunked_updates_equal_one_update():
+    whole = StreamingMetrics().update(actual, predicted, decay=0.98)
+    chunked = StreamingMetrics()
+    for start in range(0, 200, 17):
+        chunked.update(actual[start:start + 17], predicted[start:start + 17], decay=0.98)
+    np.testing.assert_allclose(chunked.as_row(), whole.as_row())
+
+
+def test_decay_forgets_old_errors():
+    metrics = StreamingMetrics().update(actual, actual + 100, decay=0.9)
+    metrics.update(actual, actual + 1, decay=0.9)
+    # 200 recent small errors swamp the faded large ones
+    assert metrics.to_dict()["mae"] < 1.01
+
+
+def test_merge_and_round_trip():
+    a = StreamingMetrics().update(actual[:100], predicted[:100], decay=1.0)
+    b = StreamingMetrics().update(actual[100:], predicted[100:], decay=1.0)
+    merged = StreamingMetrics(*a.as_row()).merge(b)
+    whole = StreamingMetrics().update(actual, predicted, decay=1.0)
+    np.testing.assert_allclose(merged.as_row(), whole.as_row())
+
+
+def test_empty_metrics_are_unknown():
+    metrics = StreamingMetrics().update([], []).to_dict()
+    assert metrics == {"n": 0.0, "r2": None, "rmse": None, "mae": None, "bias": None}
+
+
+def test_forecasts_are_logged_once_and_scored_when_the_hour_completes(tmp_path):
+    db_path = str(tmp_path / "aqi.db")
+    SourceReconciler(db_path)
+    evaluator = OnlineEvaluator(db_path, decay=1.0)
+    issued = datetime(2026, 3, 1, 10, 20)
+
+    assert evaluator.record_forecast("xgboost", "Delhi", [120, 130], issued) == 2
+    # A second ingest cycle in the same hour does not log the forecast again
+    assert evaluator.record_forecast("xgboost", "Delhi", [999, 999], issued.replace(minute=50)) == 0
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO aqi_hourly (city, timestamp, aqi) VALUES (?, ?, ?)", [
+        ("Delhi", "2026-03-01T11:00:00", 110.0),
+        ("Delhi", "2026-03-01T12:00:00", 150.0),
+    ])
+    conn.commit()
+    conn.close()
+
+    # 12:00 is still in progress, so only the horizon-1 forecast is scored
+    assert evaluator.evaluate(now=datetime(2026, 3, 1, 12, 30)) == 1
+    summary = evaluator.summary()
+    assert summary["by_horizon"]["xgboost"] == {
+        "1": {"n": 1.0, "r2": None, "rmse": 10.0, "mae": 10.0, "bias": -10.0}
+    }
+
+    assert evaluator.evaluate(now=datetime(2026, 3, 1, 13, 5)) == 1
+    assert summary["models"]["xgboost"]["n"] == 1.0
+    assert evaluator.summary()["models"]["xgboost"]["n"] == 2.0
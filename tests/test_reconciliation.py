@@ -0,0 +1,75 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add project root to path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from data_fetch.data_manager import DataManager
+from data_fetch.reconciliation import SourceReconciler
+from data_fetch.rollups import METRICS
+
+
+def reading(city, timestamp, source, **values):
+    return {"city": city, "station_id": f"{city}-1", "timestamp": timestamp, "source": source, **values}
+
+
+def hourly_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query("SELECT * FROM aqi_hourly ORDER BY city, timestamp", conn)
+    conn.close()
+    return df
+
+
+def test_fuse_prefers_sources_by_priority_and_averages_weather(tmp_path):
+    reconciler = SourceReconciler(
+        str(tmp_path / "aqi.db"), source_priority=["CPCB", "OpenWeather"],
+        field_strategy={"default": "priority", "temperature": "mean"})
+    hour = "2026-03-01T10:00:00"
+    raw = pd.DataFrame([
+        {"city": "Delhi", "timestamp": "2026-03-01T10:05:00", "source": "OpenWeather",
+         "aqi": 150.0, "pm10": 180.0, "temperature": 20.0},
+        {"city": "Delhi", "timestamp": "2026-03-01T10:40:00", "source": "CPCB",
+         "aqi": 170.0, "pm10": np.nan, "temperature": 24.0},
+        {"city": "Delhi", "timestamp": "2026-03-01T10:50:00", "source": "Unlisted",
+         "aqi": 999.0, "pm10": 999.0, "temperature": 22.0},
+    ]).reindex(columns=["city", "timestamp", "source"] + METRICS).assign(hour=hour)
+
+    fused = reconciler.fuse(raw).iloc[0]
+    assert fused["aqi"] == 170.0
+    # CPCB did not report PM10, so the next source in priority order is used
+    assert fused["pm10"] == 180.0
+    assert fused["temperature"] == 22.0
+    assert fused["sources"] == "CPCB,OpenWeather,Unlisted"
+    assert fused["n_readings"] == 3
+
+
+def test_reconcile_only_refuses_hours_with_new_rows(tmp_path):
+    db_path = str(tmp_path / "aqi.db")
+    manager = DataManager(db_path)
+    manager.insert_aqi_data([
+        reading("Delhi", "2026-03-01T10:05:00", "OpenWeather", AQI=150.0, temperature=20.0),
+        reading("Delhi", "2026-03-01T11:05:00", "OpenWeather", AQI=160.0, temperature=21.0),
+        reading("Mumbai", "2026-03-01T10:05:00", "OpenWeather", AQI=90.0),
+    ], "OpenWeather")
+
+    assert manager.reconciler.reconcile() == 3
+    assert manager.reconciler.reconcile() == 0
+
+    # A late CPCB reading revises one hour already in aqi_hourly
+    manager.insert_aqi_data([
+        reading("Delhi", "2026-03-01T10:45:00", "CPCB", AQI=175.0, temperature=22.0),
+    ], "CPCB")
+    assert manager.reconciler.reconcile() == 1
+
+    hourly = hourly_rows(db_path).set_index(["city", "timestamp"])
+    revised = hourly.loc[("Delhi", "2026-03-01T10:00:00")]
+    assert revised["aqi"] == 175.0
+    assert revised["temperature"] == 21.0
+    assert revised["n_readings"] == 2
+    assert hourly.loc[("Delhi", "2026-03-01T11:00:00"), "aqi"] == 160.0
+    assert len(hourly) == 3